@@ -9,8 +9,26 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Rental_project.settings')
 
-application = get_asgi_application()
+# Set up Django before importing anything that touches models. This is
+# get_asgi_application() with a handler that streams bodies off the event loop.
+django.setup(set_prefix=False)
+
+from rental_app.handlers import StreamingASGIHandler  # noqa: E402
+
+django_asgi_app = StreamingASGIHandler()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from rental_app.authentication import WebSocketJWTAuthMiddleware  # noqa: E402
+from rental_app.routing import websocket_urlpatterns  # noqa: E402
+from rental_app.services import warm_up_from_settings  # noqa: E402
+
+warm_up_from_settings()
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': WebSocketJWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+})
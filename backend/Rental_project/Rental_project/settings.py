@@ -15,17 +15,12 @@ from dotenv import load_dotenv
 from corsheaders.defaults import default_headers
 
 import os
-import firebase_admin
-from firebase_admin import credentials
 from datetime import timedelta
 
 # Path to your Firebase credentials JSON file
 FIREBASE_CREDENTIALS_PATH = r"../rentinghostels-firebase-adminsdk-fbsvc-3311ee8fee.json"
 
-# Initialize Firebase if not already initialized
-if not firebase_admin._apps:
-    cred = credentials.Certificate(FIREBASE_CREDENTIALS_PATH)
-    firebase_admin.initialize_app(cred)
+# The Firebase app is initialized on first use (rental_app.services)
 
 
 
@@ -67,6 +62,7 @@ CORS_ALLOW_HEADERS = list(default_headers) + [
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # ASGI runserver so WebSockets work in development
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -75,7 +71,8 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rental_app',
     'rest_framework',
-    'corsheaders'
+    'corsheaders',
+    'channels',
 ]
 
 
@@ -112,22 +109,83 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Rental_project.wsgi.application'
+ASGI_APPLICATION = 'Rental_project.asgi.application'
+
+# Pushes chat messages and notifications to open WebSockets. The in-memory
+# layer only reaches sockets served by the same process; set
+# CHANNEL_REDIS_URL (requires channels_redis) when running several workers.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+if os.getenv('CHANNEL_REDIS_URL'):
+    CHANNEL_LAYERS['default'] = {
+        'BACKEND': 'channels_redis.core.RedisChannelLayer',
+        'CONFIG': {'hosts': [os.getenv('CHANNEL_REDIS_URL')]},
+    }
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+MONGO_WRITE_CONCERN = os.getenv('MONGO_WRITE_CONCERN', '1')
+
 DATABASES = {
     'default': {
         'ENGINE': 'djongo',
         'NAME': os.getenv('MONGO_DB_NAME'),  
+        # djongo builds one MongoClient per process from these options and
+        # rental_app.mongo shares it with GridFS and raw collection access
         'CLIENT': {
-            'host': os.getenv('MONGO_HOST'),  
-        }
+            'host': os.getenv('MONGO_HOST'),
+            'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+            'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+            'maxIdleTimeMS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000)),
+            'waitQueueTimeoutMS': int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000)),
+            'connectTimeoutMS': int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000)),
+            'serverSelectionTimeoutMS': int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000)),
+            'socketTimeoutMS': int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 60000)),
+            'readPreference': os.getenv('MONGO_READ_PREFERENCE', 'primary'),
+            'readConcernLevel': os.getenv('MONGO_READ_CONCERN', 'local'),
+            'w': int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN,
+            'wTimeoutMS': int(os.getenv('MONGO_WRITE_TIMEOUT_MS', 10000)),
+        },
+        # Keep the shared client open between requests; djongo closes it
+        # whenever the per-request connection is closed
+        'CONN_MAX_AGE': None,
     }
 }
 
 
+# Serve the hottest read endpoints (approved listings, apartment detail,
+# chats, inbox, notifications) with native pymongo queries instead of
+# djongo's SQL translation; see rental_app.repository
+NATIVE_READS = os.getenv('NATIVE_READS', 'true').lower() == 'true'
+
+
+# Parsed SQL of djongo queries is kept per query shape (parameters are
+# bound on each execution); QUERY_PARSE_CACHE=false turns it off
+QUERY_PARSE_CACHE = os.getenv('QUERY_PARSE_CACHE', 'true').lower() == 'true'
+QUERY_PARSE_CACHE_SIZE = int(os.getenv('QUERY_PARSE_CACHE_SIZE', 512))
+
+
+# Cache for public listing payloads. Local memory suits a single process;
+# point CACHE_BACKEND/CACHE_LOCATION at a shared backend such as memcached
+# when running several workers so invalidations reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'rental-listings'),
+    }
+}
+
+LISTING_CACHE_TIMEOUT = int(os.getenv('LISTING_CACHE_TIMEOUT', 300))
+
+# Cached unread notification counters are recounted at least this often
+NOTIFICATION_COUNT_TIMEOUT = int(os.getenv('NOTIFICATION_COUNT_TIMEOUT', 3600))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -196,6 +254,34 @@ AUTH_USER_MODEL = 'rental_app.User'  # Ensure 'rental_app' is the actual app nam
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_SECRET_KEY = os.getenv("RAZORPAY_SECRET_KEY")
 
+# Dotted path of the payment gateway; rental_app.gateway.FakeGateway for tests
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "rental_app.gateway.RazorpayGateway")
+RAZORPAY_POOL_SIZE = int(os.getenv("RAZORPAY_POOL_SIZE", 10))
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", 3))
+RAZORPAY_READ_TIMEOUT = float(os.getenv("RAZORPAY_READ_TIMEOUT", 10))
+RAZORPAY_MAX_RETRIES = int(os.getenv("RAZORPAY_MAX_RETRIES", 3))
+# Base of the jittered exponential backoff between retries, in seconds
+RAZORPAY_BACKOFF = float(os.getenv("RAZORPAY_BACKOFF", 0.5))
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
+
+# Webhook event queue and reconciliation of pending payments (rental_app.settlement)
+PAYMENT_EVENT_BATCH_SIZE = int(os.getenv("PAYMENT_EVENT_BATCH_SIZE", 50))
+PAYMENT_EVENT_MAX_ATTEMPTS = int(os.getenv("PAYMENT_EVENT_MAX_ATTEMPTS", 5))
+PAYMENT_RECONCILE_BATCH_SIZE = int(os.getenv("PAYMENT_RECONCILE_BATCH_SIZE", 20))
+# Seconds a payment stays pending before reconciliation asks Razorpay about it
+PAYMENT_RECONCILE_MIN_AGE = int(os.getenv("PAYMENT_RECONCILE_MIN_AGE", 600))
+PAYMENT_RECONCILE_INTERVAL = int(os.getenv("PAYMENT_RECONCILE_INTERVAL", 60))
+
+# Minutes a new booking holds its bed while the tenant pays
+BED_HOLD_MINUTES = int(os.getenv("BED_HOLD_MINUTES", 15))
+BED_HOLD_SWEEP_INTERVAL = int(os.getenv("BED_HOLD_SWEEP_INTERVAL", 60))
+
+# External clients connect lazily; services listed here (comma separated,
+# e.g. "mongo,firebase") are created when a wsgi/asgi worker boots instead
+WARM_UP_SERVICES = [
+    name.strip() for name in os.getenv("WARM_UP_SERVICES", "").split(",") if name.strip()
+]
+
 
 
 CSRF_TRUSTED_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -212,3 +298,13 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = "alameena068@gmail.com"  # Replace with your email
 EMAIL_HOST_PASSWORD = "syfierjooftkjocz"  # Use an App Password (Not your email password)
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Background delivery of queued emails (rental_app.outbox). Deliver them with
+# `manage.py process_email_outbox --loop` in its own process; AUTOSTART runs
+# worker threads inside every web process instead and suits single-process setups.
+EMAIL_OUTBOX_AUTOSTART = os.getenv('EMAIL_OUTBOX_AUTOSTART', 'false').lower() == 'true'
+EMAIL_OUTBOX_WORKERS = int(os.getenv('EMAIL_OUTBOX_WORKERS', 2))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 20))
+EMAIL_OUTBOX_POLL_INTERVAL = int(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 30))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 30))
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Rental_project.settings')
 
 application = get_wsgi_application()
+
+from rental_app.services import warm_up_from_settings  # noqa: E402
+
+warm_up_from_settings()
@@ -5,4 +5,13 @@ class RentalAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rental_app'
 
-    
+    def ready(self):
+        from pymongo import monitoring
+
+        from . import signals  # noqa: F401
+        from .mongo import pool_monitor
+        from .querycache import configure
+
+        # Must be registered before the first MongoClient is created
+        monitoring.register(pool_monitor)
+        configure()
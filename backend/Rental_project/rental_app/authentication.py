@@ -1,7 +1,13 @@
+from urllib.parse import parse_qs
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
 import jwt
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
 from .models import Admin
 
 class AdminAuthentication(BaseAuthentication):
@@ -31,3 +37,28 @@ class AdminAuthentication(BaseAuthentication):
         admin.is_authenticated = True  
 
         return (admin, None)  # Return the admin instance
+
+
+@database_sync_to_async
+def get_websocket_user(raw_token):
+    if not raw_token:
+        return AnonymousUser()
+
+    authenticator = JWTAuthentication()
+    try:
+        validated_token = authenticator.get_validated_token(raw_token)
+        return authenticator.get_user(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class WebSocketJWTAuthMiddleware(BaseMiddleware):
+    """Authenticates WebSocket connections from a ``?token=<access token>`` query string.
+
+    Browsers cannot set an Authorization header on WebSocket handshakes.
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        scope["user"] = await get_websocket_user(query.get("token", [None])[0])
+        return await super().__call__(scope, receive, send)
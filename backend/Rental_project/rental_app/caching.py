@@ -0,0 +1,78 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Bumped on every listing change so all cached pages go stale at once
+LISTING_GENERATION_KEY = "listings:generation"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_stats():
+    """Hit/miss counters of this process since start-up."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def cached_payload(key, build, timeout=None):
+    """Return the cached payload for key, building and storing it on a miss.
+
+    ``build`` returns the serialized payload, or None for responses that
+    must not be cached (e.g. not found).
+    """
+    payload = cache.get(key)
+    if payload is not None:
+        _record("hits")
+        return payload
+
+    _record("misses")
+    payload = build()
+    if payload is not None:
+        cache.set(key, payload, timeout or settings.LISTING_CACHE_TIMEOUT)
+    return payload
+
+
+def _digest(value):
+    return hashlib.md5(value.encode("utf-8")).hexdigest()
+
+
+def listing_key(request, name):
+    """Key for one page of a public listing, scoped to the current generation."""
+    generation = cache.get_or_set(LISTING_GENERATION_KEY, time.time_ns, None)
+    # Paginated bodies embed absolute links, so the full URL is part of the key
+    return f"listings:{generation}:{name}:{_digest(request.build_absolute_uri())}"
+
+
+def apartment_key(apartment_id, name):
+    return f"apartment:{apartment_id}:{name}"
+
+
+def invalidate_listings():
+    try:
+        cache.incr(LISTING_GENERATION_KEY)
+    except ValueError:
+        # Generation was evicted; restart from a value no earlier page used
+        cache.set(LISTING_GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_apartment(apartment_id):
+    """Drop the cached payloads of one apartment and every listing page."""
+    cache.delete_many(
+        [apartment_key(apartment_id, "detail"), apartment_key(apartment_id, "images")]
+    )
+    invalidate_listings()
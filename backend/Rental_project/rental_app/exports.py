@@ -0,0 +1,104 @@
+import csv
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from bson.decimal128 import Decimal128
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .mongo import collection
+
+# Rows fetched from MongoDB per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+PAYMENT_EXPORT_COLUMNS = (
+    "payment_id",
+    "transaction_id",
+    "booking_id",
+    "user_id",
+    "apartment_id",
+    "amount",
+    "payment_status",
+    "payment_method",
+    "razorpay_order_id",
+    "razorpay_payment_id",
+    "timestamp",
+)
+
+BOOKING_EXPORT_COLUMNS = (
+    "booking_id",
+    "apartment_id",
+    "user_id",
+    "booking_date",
+    "checkout_date",
+    "status",
+)
+
+
+def export_value(value):
+    if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+        # pymongo returns the stored UTC time without tzinfo
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([export_value(value) for value in row])
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        record = dict(zip(columns, (export_value(value) for value in row)))
+        yield json.dumps(record) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_lines),
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+}
+
+
+def export_rows(model, query, columns, sort_field):
+    """Rows of the model's collection as tuples, fetched EXPORT_CHUNK_SIZE at a time.
+
+    Reads go through pymongo rather than the ORM, so the rows can be pulled
+    from any thread; under ASGI, StreamingASGIHandler pulls them in a worker
+    thread to keep each batch fetch off the event loop.
+    """
+    cursor = (
+        collection(model._meta.db_table)
+        .find(query, {"_id": 0, **{column: 1 for column in columns}})
+        .sort(sort_field, 1)
+        .batch_size(EXPORT_CHUNK_SIZE)
+    )
+    for document in cursor:
+        yield tuple(document.get(column) for column in columns)
+
+
+def streaming_export(model, query, columns, sort_field, file_format, filename):
+    """Stream matching documents as CSV or NDJSON without loading them into memory."""
+    content_type, render = EXPORT_FORMATS[file_format]
+    rows = export_rows(model, query, columns, sort_field)
+    response = StreamingHttpResponse(render(columns, rows), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
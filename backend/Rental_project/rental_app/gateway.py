@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import random
+
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from razorpay.errors import BadRequestError
+from requests.adapters import HTTPAdapter
+
+from .services import services
+
+
+class PaymentGatewayError(Exception):
+    """The gateway rejected a call or kept failing after every retry."""
+
+
+def verify_webhook_signature(body, signature):
+    """Check X-Razorpay-Signature: hex HMAC-SHA256 of the raw body with the webhook secret."""
+    secret = settings.RAZORPAY_WEBHOOK_SECRET
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def backoff_delay(attempt, base):
+    """Full-jitter exponential backoff: a random wait in [0, base * 2**attempt)."""
+    return random.uniform(0, base * 2 ** attempt)
+
+
+class BaseGateway:
+    """Retry policy and request payloads shared by every gateway.
+
+    Every method is a coroutine. Waits between retries happen on the
+    event loop, so a flaky gateway does not pin a worker thread.
+    Subclasses implement ``_send(name, payload)`` for one attempt.
+    """
+
+    async def _call(self, name, payload):
+        attempts = settings.RAZORPAY_MAX_RETRIES
+        for attempt in range(attempts):
+            try:
+                return await self._send(name, payload)
+            except BadRequestError as e:
+                # Invalid input fails the same way every time
+                raise PaymentGatewayError(str(e)) from e
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise PaymentGatewayError(str(e)) from e
+                await asyncio.sleep(
+                    backoff_delay(attempt, settings.RAZORPAY_BACKOFF)
+                )
+
+    async def create_order(self, amount_paise, receipt):
+        return await self._call(
+            "order.create",
+            {
+                "amount": amount_paise,
+                "currency": "INR",
+                "receipt": receipt,
+                "payment_capture": 1,
+            },
+        )
+
+    async def create_payment_link(self, amount_paise, reference_id, callback_url):
+        return await self._call(
+            "payment_link.create",
+            {
+                "amount": amount_paise,
+                "currency": "INR",
+                "description": "Apartment Booking Payment",
+                "notify": {"sms": True, "email": True},
+                "reminder_enable": True,
+                "callback_url": callback_url,
+                "callback_method": "get",
+                "reference_id": reference_id,
+            },
+        )
+
+    async def find_captured_payment(self, order_id):
+        """Razorpay payment id that settled one of our orders, or None while unpaid."""
+        payments = await self._call("order.payments", order_id)
+        for item in payments.get("items", []):
+            if item.get("status") == "captured":
+                return item["id"]
+
+        # Payment links collect on an order of their own, tagged with ours
+        links = await self._call("payment_link.all", {"reference_id": order_id})
+        for link in links.get("payment_links", []):
+            if link.get("status") == "paid" and link.get("payments"):
+                return link["payments"][0]["payment_id"]
+        return None
+
+
+class RazorpayGateway(BaseGateway):
+    """Razorpay calls over one pooled HTTP session, shared by all requests.
+
+    The blocking SDK call runs in a worker thread only while the HTTP
+    request is in flight.
+    """
+
+    def __init__(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings.RAZORPAY_POOL_SIZE
+        )
+        session.mount("https://", adapter)
+        self.client = razorpay.Client(
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_SECRET_KEY),
+        )
+        self.timeout = (
+            settings.RAZORPAY_CONNECT_TIMEOUT,
+            settings.RAZORPAY_READ_TIMEOUT,
+        )
+
+    async def _send(self, name, payload):
+        resource, action = name.split(".")
+        method = getattr(getattr(self.client, resource), action)
+        return await sync_to_async(method, thread_sensitive=False)(
+            payload, timeout=self.timeout
+        )
+
+
+class FakeGateway(BaseGateway):
+    """In-process stand-in for tests and local development.
+
+    Records every attempt in ``calls`` as (name, payload). Set
+    ``failures`` to make that many upcoming attempts fail transiently,
+    and ``capture(order_id)`` to mark an order as paid.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.failures = 0
+        self.captured = {}
+        self._ids = itertools.count(1)
+
+    def capture(self, order_id):
+        payment_id = f"pay_fake{next(self._ids)}"
+        self.captured[order_id] = payment_id
+        return payment_id
+
+    async def _send(self, name, payload):
+        self.calls.append((name, payload))
+        if self.failures:
+            self.failures -= 1
+            raise requests.ConnectionError(f"Simulated {name} failure")
+
+        if name == "order.payments":
+            payment_id = self.captured.get(payload)
+            items = [{"id": payment_id, "status": "captured"}] if payment_id else []
+            return {"items": items}
+        if name == "payment_link.all":
+            return {"payment_links": []}
+        if name == "order.create":
+            return {
+                "id": f"order_fake{next(self._ids)}",
+                "amount": payload["amount"],
+                "currency": payload["currency"],
+                "receipt": payload["receipt"],
+                "status": "created",
+            }
+        link_id = f"plink_fake{next(self._ids)}"
+        return {
+            "id": link_id,
+            "amount": payload["amount"],
+            "reference_id": payload["reference_id"],
+            "short_url": f"https://rzp.io/i/{link_id}",
+        }
+
+
+def get_gateway():
+    """The process-wide gateway named by settings.PAYMENT_GATEWAY."""
+    return services.get("payment_gateway")
+
+
+@receiver(setting_changed)
+def reset_gateway(setting, **kwargs):
+    if setting == "PAYMENT_GATEWAY" or setting.startswith("RAZORPAY_"):
+        services.reset("payment_gateway")
@@ -0,0 +1,90 @@
+import base64
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+# Longest side of the inline preview shown while the real image loads
+PLACEHOLDER_SIZE = 16
+
+# Longest side in pixels of each resized copy served to clients
+IMAGE_VARIANTS = {
+    "thumbnail": 160,
+    "card": 480,
+    "full": 1600,
+}
+
+# Variants are WebP when Pillow was built with it, JPEG otherwise
+if features.check("webp"):
+    VARIANT_FORMAT, VARIANT_CONTENT_TYPE = "WEBP", "image/webp"
+else:
+    VARIANT_FORMAT, VARIANT_CONTENT_TYPE = "JPEG", "image/jpeg"
+
+
+def describe_image(data):
+    """Return the dimensions and a tiny base64 JPEG placeholder for raw image bytes.
+
+    The result is stored alongside the GridFS file so listings can reserve
+    space and paint a blurred preview without downloading the image.
+    Unreadable uploads are described as an empty dict.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            width, height = image.size
+            preview = image.convert("RGB")
+    except (OSError, Image.DecompressionBombError):
+        return {}
+
+    preview.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    preview.save(buffer, format="JPEG", quality=40)
+    placeholder = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return {
+        "width": width,
+        "height": height,
+        "placeholder": f"data:image/jpeg;base64,{placeholder}",
+    }
+
+
+def render_variant(data, max_side):
+    """Downscale raw image bytes to fit within max_side; returns None if unreadable."""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            # Apply the camera orientation before the EXIF data is dropped
+            resized = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+    resized.thumbnail((max_side, max_side))
+    buffer = BytesIO()
+    resized.save(buffer, format=VARIANT_FORMAT, quality=80)
+    return buffer.getvalue()
+
+
+def store_variant(fs, data, original_id, filename, size):
+    """Render one variant of a GridFS original and store it as a linked file.
+
+    Returns the new GridFS id as a string, or None if the original could
+    not be decoded as an image.
+    """
+    rendered = render_variant(data, IMAGE_VARIANTS[size])
+    if rendered is None:
+        return None
+
+    file_id = fs.put(
+        rendered,
+        filename=f"{size}-{filename}",
+        content_type=VARIANT_CONTENT_TYPE,
+        variant_of=original_id,
+        variant=size,
+        **describe_image(rendered),
+    )
+    return str(file_id)
+
+
+def store_variants(fs, data, original_id, filename):
+    """Store every variant of an upload; returns ApartmentImage field values."""
+    return {
+        f"{size}_path": store_variant(fs, data, original_id, filename, size)
+        for size in IMAGE_VARIANTS
+    }
@@ -0,0 +1,104 @@
+"""Declared MongoDB indexes for the hot query paths.
+
+djongo's migrations only cover plain Meta.indexes, so compound indexes
+on foreign keys and partial indexes live here and are applied with
+``manage.py ensure_indexes``. Meta.indexes of the app's models are part
+of the catalog too, so one command checks every index the code relies on.
+"""
+from collections import namedtuple
+
+import pymongo
+from django.apps import apps
+from pymongo import IndexModel
+
+from .models import (
+    ApartmentImage,
+    Booking,
+    Chat,
+    HostelApproval,
+    Notification,
+    Payment,
+)
+
+CatalogIndex = namedtuple("CatalogIndex", "collection name keys partial")
+
+
+def index(model, *fields, name, partial=None):
+    """Catalog entry on model fields; a leading "-" sorts that field descending."""
+    keys = []
+    for field in fields:
+        direction = pymongo.DESCENDING if field.startswith("-") else pymongo.ASCENDING
+        keys.append((model._meta.get_field(field.lstrip("-")).column, direction))
+    return CatalogIndex(model._meta.db_table, name, tuple(keys), partial)
+
+
+INDEX_CATALOG = (
+    index(Chat, "receiver", "is_read", name="chat_receiver_unread_idx"),
+    # Only unread rows are ever filtered by user, so read ones stay out of the index
+    index(
+        Notification,
+        "user",
+        "-timestamp",
+        name="notification_user_unread_idx",
+        partial={"read_status": 0},
+    ),
+    index(Payment, "razorpay_order_id", name="payment_order_idx"),
+    index(Payment, "apartment", "-timestamp", name="payment_apartment_recent_idx"),
+    # Reconciliation sweeps only look at pending payments
+    index(
+        Payment,
+        "timestamp",
+        name="payment_pending_idx",
+        partial={"payment_status": "pending"},
+    ),
+    index(Booking, "user", name="booking_user_idx"),
+    index(Booking, "apartment", name="booking_apartment_idx"),
+    index(HostelApproval, "status", "apartment", name="approval_status_apartment_idx"),
+    index(ApartmentImage, "apartment", name="apartment_image_apartment_idx"),
+)
+
+
+def meta_indexes():
+    """Meta.indexes declared on the app's models, as catalog entries."""
+    for model in apps.get_app_config("rental_app").get_models():
+        for meta_index in model._meta.indexes:
+            yield index(model, *meta_index.fields, name=meta_index.name)
+
+
+def catalog():
+    return list(meta_indexes()) + list(INDEX_CATALOG)
+
+
+def key_direction(direction):
+    """1/-1 as ints (the server may report 1.0); "text", "2dsphere" and the like as-is."""
+    return int(direction) if isinstance(direction, (int, float)) else direction
+
+
+def index_signature(keys, partial):
+    """What makes two indexes interchangeable: key order/directions and partial filter."""
+    return tuple((key, key_direction(direction)) for key, direction in keys), repr(
+        sorted((partial or {}).items())
+    )
+
+
+def live_signatures(info):
+    """Map signature -> name for collection.index_information()."""
+    return {
+        index_signature(spec["key"], spec.get("partialFilterExpression")): name
+        for name, spec in info.items()
+    }
+
+
+def index_model(entry):
+    options = {"name": entry.name, "background": True}
+    if entry.partial:
+        options["partialFilterExpression"] = entry.partial
+    return IndexModel(list(entry.keys), **options)
+
+
+def usage(collection):
+    """Operations served by each index since the server last restarted."""
+    return {
+        row["name"]: row["accesses"]["ops"]
+        for row in collection.aggregate([{"$indexStats": {}}])
+    }
@@ -0,0 +1,102 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import invalidate_apartment
+from .metrics import bump, metric_day
+from .models import Apartment, Booking
+from .mongo import collection
+
+
+def _adjust_beds(apartment_id, delta, guard=None):
+    """$inc available_beds on one apartment; djongo cannot translate F() updates."""
+    apartment_id = uuid.UUID(str(apartment_id))
+    query = {"apartment_id": apartment_id, **(guard or {})}
+    result = collection(Apartment._meta.db_table).update_one(
+        query, {"$inc": {"available_beds": delta}}
+    )
+    if result.modified_count:
+        # Raw updates skip post_save, which normally drops cached listings
+        invalidate_apartment(apartment_id)
+    return bool(result.modified_count)
+
+
+def reserve_bed(apartment_id):
+    """Take one bed with a single conditional update; False when none are left.
+
+    The ``available_beds > 0`` guard and the decrement are one MongoDB
+    update, so concurrent confirmations can never oversell.
+    """
+    return _adjust_beds(apartment_id, -1, {"available_beds": {"$gt": 0}})
+
+
+def release_bed(apartment_id):
+    """Give one bed back to the apartment."""
+    return _adjust_beds(apartment_id, 1)
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(minutes=settings.BED_HOLD_MINUTES)
+
+
+def take_hold(booking):
+    """Clear a booking's checkout hold, handing its bed to the caller.
+
+    Returns False if the hold is already gone. An expired hold that has
+    not been swept yet still counts: whichever of payment confirmation
+    and the sweeper clears hold_expires_at first owns the bed.
+    """
+    result = collection(Booking._meta.db_table).update_one(
+        {"booking_id": booking.booking_id, "hold_expires_at": {"$ne": None}},
+        {"$set": {"hold_expires_at": None}},
+    )
+    return bool(result.modified_count)
+
+
+def release_hold(booking):
+    """Clear a booking's hold and return its bed to the apartment."""
+    if take_hold(booking):
+        release_bed(booking.apartment_id)
+        return True
+    return False
+
+
+def release_expired_holds(apartment_id=None):
+    """Sweep holds past their expiry back into inventory; returns how many."""
+    expired = Booking.objects.filter(hold_expires_at__lte=timezone.now())
+    if apartment_id is not None:
+        expired = expired.filter(apartment_id=apartment_id)
+
+    released = 0
+    for booking in expired.only("booking_id", "apartment_id").iterator():
+        # The booking stays active, so a late payment can still claim a free bed
+        released += release_hold(booking)
+    return released
+
+
+def cancel_booking(booking):
+    """Cancel a booking once, returning its bed or checkout hold.
+
+    Returns False when the booking was already cancelled, including by a
+    concurrent request that got there first.
+    """
+    if booking.status == "cancelled":
+        return False
+
+    cancelled = Booking.objects.filter(
+        booking_id=booking.booking_id, status=booking.status
+    ).update(status="cancelled")
+    if not cancelled:
+        return False
+
+    if booking.status == "confirmed":
+        release_bed(booking.apartment_id)
+    else:
+        # No-op when the checkout hold already expired
+        release_hold(booking)
+    # update() skips the post_save counter
+    bump(metric_day(), bookings_cancelled=1)
+    booking.status = "cancelled"
+    return True
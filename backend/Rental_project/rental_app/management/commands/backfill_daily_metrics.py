@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from rental_app.metrics import backfill
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyMetrics rollups from bookings, payments, users and listings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only rebuild days from this date (YYYY-MM-DD); default is everything.",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a date in YYYY-MM-DD format")
+
+        days = backfill(since)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt metrics for {days} day(s)"))
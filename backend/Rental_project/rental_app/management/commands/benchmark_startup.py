@@ -0,0 +1,58 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter so every import is paid for again
+STARTUP_SCRIPT = """
+import json, os, time
+started = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+import Rental_project.urls
+loaded = time.perf_counter()
+from rental_app.services import services
+warm = services.warm_up(*[name for name in os.environ["WARM_UP"].split(",") if name])
+print(json.dumps({"setup": setup - started, "urls": loaded - setup, "warm_up": warm}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold worker startup (django.setup() plus URLconf import) in fresh processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument(
+            "--warm-up",
+            default="",
+            help="Comma separated services to create after startup, e.g. mongo,firebase.",
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, WARM_UP=options["warm_up"])
+        env.setdefault("DJANGO_SETTINGS_MODULE", "Rental_project.settings")
+
+        runs = []
+        for _ in range(options["runs"]):
+            output = subprocess.run(
+                [sys.executable, "-c", STARTUP_SCRIPT],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        for phase in ("setup", "urls"):
+            timings = [run[phase] * 1000 for run in runs]
+            self.stdout.write(
+                f"{phase}: median {statistics.median(timings):.1f} ms, "
+                f"min {min(timings):.1f} ms, max {max(timings):.1f} ms"
+            )
+        for name in runs[0]["warm_up"]:
+            timings = [run["warm_up"].get(name, 0) * 1000 for run in runs]
+            self.stdout.write(f"warm up {name}: median {statistics.median(timings):.1f} ms")
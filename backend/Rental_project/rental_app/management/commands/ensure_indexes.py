@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from rental_app.indexes import catalog, index_model, index_signature, live_signatures, usage
+from rental_app.mongo import collection
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the catalogued MongoDB indexes that are missing and report "
+        "indexes that have not served a query since the server started."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be created.",
+        )
+
+    def handle(self, *args, **options):
+        entries = defaultdict(list)
+        for entry in catalog():
+            entries[entry.collection].append(entry)
+
+        for name, wanted in sorted(entries.items()):
+            coll = collection(name)
+            info = coll.index_information()
+            live = live_signatures(info)
+
+            missing = [
+                entry
+                for entry in wanted
+                if index_signature(entry.keys, entry.partial) not in live
+            ]
+            for entry in missing:
+                # The name is taken by a different definition, e.g. a descending
+                # Meta index that djongo's migration created with a mangled key
+                replace = entry.name in info
+                if options["dry_run"]:
+                    action = "Would replace" if replace else "Would create"
+                else:
+                    action = "Replacing" if replace else "Creating"
+                self.stdout.write(f"{action} {name}.{entry.name} {list(entry.keys)}")
+            if missing and not options["dry_run"]:
+                for entry in missing:
+                    if entry.name in info:
+                        coll.drop_index(entry.name)
+                coll.create_indexes([index_model(entry) for entry in missing])
+
+            # $indexStats counts from the last server restart, and new indexes start at 0
+            created = {entry.name for entry in missing}
+            for index_name, ops in sorted(usage(coll).items()):
+                if ops == 0 and index_name != "_id_" and index_name not in created:
+                    self.stdout.write(
+                        self.style.WARNING(f"Unused: {name}.{index_name} (0 ops)")
+                    )
+
+        self.stdout.write(self.style.SUCCESS("Index catalog checked"))
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rental_app.outbox import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox, once or continuously."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling the outbox instead of exiting when it is empty.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = process_outbox()
+            self.stdout.write(f"Sent {sent} email(s)")
+            if not options["loop"]:
+                break
+            time.sleep(settings.EMAIL_OUTBOX_POLL_INTERVAL)
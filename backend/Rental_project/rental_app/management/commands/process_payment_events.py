@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rental_app.settlement import process_payment_events, reconcile_pending_payments
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook events and reconcile pending payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running every PAYMENT_RECONCILE_INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            handled = process_payment_events()
+            settled = reconcile_pending_payments()
+            self.stdout.write(
+                f"Processed {handled} event(s), reconciled {settled} payment(s)"
+            )
+            if not options["loop"]:
+                break
+            time.sleep(settings.PAYMENT_RECONCILE_INTERVAL)
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rental_app.inventory import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Return beds held by unpaid bookings past their hold expiry."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping every BED_HOLD_SWEEP_INTERVAL seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_expired_holds()
+            self.stdout.write(f"Released {released} expired hold(s)")
+            if not options["loop"]:
+                break
+            time.sleep(settings.BED_HOLD_SWEEP_INTERVAL)
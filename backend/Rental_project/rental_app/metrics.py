@@ -0,0 +1,128 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from uuid import uuid4
+
+from django.db.models import Sum
+from django.utils import timezone
+from pymongo.errors import DuplicateKeyError
+
+from .models import Apartment, Booking, DailyMetrics, Payment, User
+from .mongo import collection
+
+logger = logging.getLogger(__name__)
+
+METRIC_FIELDS = (
+    "bookings_created",
+    "bookings_cancelled",
+    "payments_completed",
+    "revenue",
+    "new_users",
+    "new_listings",
+)
+
+
+def metric_day(moment=None):
+    """Local calendar day a timestamp counts towards (today when omitted)."""
+    return timezone.localdate(moment) if moment else timezone.localdate()
+
+
+def bump(day, **deltas):
+    """Add deltas to one day's counters with an atomic $inc upsert.
+
+    djongo cannot translate ``SET col = col + n``, so this goes to pymongo
+    directly. Counters are best effort: failures are logged, never raised,
+    because bump() runs inside post_save receivers and settlement.
+    """
+    # djongo stores DateField values as midnight datetimes
+    stored_day = datetime.combine(day, time.min)
+    on_insert = {"metrics_id": uuid4()}
+    on_insert.update({name: 0 for name in METRIC_FIELDS if name not in deltas})
+    try:
+        for attempt in range(2):
+            try:
+                collection(DailyMetrics._meta.db_table).update_one(
+                    {"date": stored_day},
+                    {"$inc": deltas, "$setOnInsert": on_insert},
+                    upsert=True,
+                )
+                return
+            except DuplicateKeyError:
+                # Two first bumps of a day raced on the unique date; the retry updates
+                if attempt:
+                    raise
+    except Exception:
+        logger.exception("Could not update daily metrics for %s", day)
+
+
+def record_payment_completed(amount_value, moment=None):
+    bump(metric_day(moment), payments_completed=1, revenue=amount_value or 0)
+
+
+def summarize(start=None, end=None):
+    """Sum the rollup rows between two dates (inclusive) in one query."""
+    rows = DailyMetrics.objects.all()
+    if start:
+        rows = rows.filter(date__gte=start)
+    if end:
+        rows = rows.filter(date__lte=end)
+    totals = rows.aggregate(**{name: Sum(name) for name in METRIC_FIELDS})
+    return {name: totals[name] or 0 for name in METRIC_FIELDS}
+
+
+def daily_series(start, end):
+    """One dict per day in the range, with zeros for days without activity."""
+    rows = {
+        row["date"]: row
+        for row in DailyMetrics.objects.filter(date__gte=start, date__lte=end).values(
+            "date", *METRIC_FIELDS
+        )
+    }
+    series = []
+    day = start
+    while day <= end:
+        row = rows.get(day, {})
+        series.append(
+            {"date": day.isoformat(), **{name: row.get(name, 0) for name in METRIC_FIELDS}}
+        )
+        day += timedelta(days=1)
+    return series
+
+
+def backfill(since=None):
+    """Rebuild the rollups from the source tables; returns the number of days written.
+
+    The source rows do not record when a booking was cancelled or a
+    payment settled, so those count on the day the row was created.
+    """
+    counts = defaultdict(lambda: dict.fromkeys(METRIC_FIELDS, 0))
+
+    start = timezone.make_aware(datetime.combine(since, time.min)) if since else None
+
+    def rows(queryset, field, *extra):
+        if start:
+            queryset = queryset.filter(**{f"{field}__gte": start})
+        return queryset.values_list(field, *extra).iterator(chunk_size=2000)
+
+    for created, booking_status in rows(Booking.objects.all(), "booking_date", "status"):
+        counts[metric_day(created)]["bookings_created"] += 1
+        if booking_status == "cancelled":
+            counts[metric_day(created)]["bookings_cancelled"] += 1
+    for paid, amount_value in rows(
+        Payment.objects.filter(payment_status="paid"), "timestamp", "amount_value"
+    ):
+        counts[metric_day(paid)]["payments_completed"] += 1
+        counts[metric_day(paid)]["revenue"] += amount_value or 0
+    for (created,) in rows(User.objects.all(), "created_at"):
+        counts[metric_day(created)]["new_users"] += 1
+    for (created,) in rows(Apartment.objects.all(), "created_at"):
+        counts[metric_day(created)]["new_listings"] += 1
+
+    stale = DailyMetrics.objects.all()
+    if since:
+        stale = stale.filter(date__gte=since)
+    stale.delete()
+    DailyMetrics.objects.bulk_create(
+        DailyMetrics(date=day, **values) for day, values in counts.items()
+    )
+    return len(counts)
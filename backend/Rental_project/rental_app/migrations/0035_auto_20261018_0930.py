@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0034_auto_20250408_0846'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='card_path',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='full_path',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='apartmentimage',
+            name='thumbnail_path',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
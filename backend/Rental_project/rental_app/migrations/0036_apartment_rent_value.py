@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 10:15
+
+from bson.decimal128 import Decimal128
+from django.db import migrations, models
+
+
+def populate_rent_value(apps, schema_editor):
+    Apartment = apps.get_model('rental_app', 'Apartment')
+    for apartment_id, rent in Apartment.objects.values_list('apartment_id', 'rent'):
+        if isinstance(rent, Decimal128):
+            rent = rent.to_decimal()
+        Apartment.objects.filter(apartment_id=apartment_id).update(rent_value=float(rent))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0035_auto_20261018_0930'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apartment',
+            name='rent_value',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_rent_value, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0036_apartment_rent_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chat',
+            index=models.Index(fields=['sender', 'receiver', 'timestamp'], name='chat_pair_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def build_conversations(apps, schema_editor):
+    Chat = apps.get_model('rental_app', 'Chat')
+    Conversation = apps.get_model('rental_app', 'Conversation')
+
+    conversations = {}
+    for chat in Chat.objects.order_by('timestamp').iterator():
+        pair = tuple(sorted([chat.sender_id, chat.receiver_id]))
+        conversation = conversations.setdefault(
+            pair, Conversation(user_low_id=pair[0], user_high_id=pair[1])
+        )
+        conversation.last_message = chat.message[:255]
+        conversation.last_sender_id = chat.sender_id
+        conversation.last_timestamp = chat.timestamp
+        if not chat.is_read:
+            if chat.receiver_id == pair[0]:
+                conversation.unread_low += 1
+            else:
+                conversation.unread_high += 1
+
+    Conversation.objects.bulk_create(conversations.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0037_chat_pair_timestamp_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('conversation_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('last_message', models.CharField(blank=True, default='', max_length=255)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('unread_low', models.IntegerField(default=0)),
+                ('unread_high', models.IntegerField(default=0)),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='rental_app.user')),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rental_app.user')),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='rental_app.user')),
+            ],
+            options={
+                'unique_together': {('user_low', 'user_high')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_low', '-last_timestamp'], name='conversation_low_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_high', '-last_timestamp'], name='conversation_high_recent_idx'),
+        ),
+        migrations.RunPython(build_conversations, migrations.RunPython.noop),
+    ]
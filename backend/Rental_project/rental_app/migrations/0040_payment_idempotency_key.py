@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 12:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0039_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='payment_url',
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+    ]
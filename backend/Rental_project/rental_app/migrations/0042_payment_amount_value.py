@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 14:05
+
+from bson.decimal128 import Decimal128
+from django.db import migrations, models
+
+
+def populate_amount_value(apps, schema_editor):
+    Payment = apps.get_model('rental_app', 'Payment')
+    for payment_id, amount in Payment.objects.values_list('payment_id', 'amount'):
+        if isinstance(amount, Decimal128):
+            amount = amount.to_decimal()
+        Payment.objects.filter(payment_id=payment_id).update(amount_value=float(amount))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0041_paymentevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='amount_value',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_amount_value, migrations.RunPython.noop),
+    ]
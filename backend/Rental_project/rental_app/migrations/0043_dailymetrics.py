@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 14:40
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_app', '0042_payment_amount_value'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('metrics_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(unique=True)),
+                ('bookings_created', models.IntegerField(default=0)),
+                ('bookings_cancelled', models.IntegerField(default=0)),
+                ('payments_completed', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('new_users', models.IntegerField(default=0)),
+                ('new_listings', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,10 +1,18 @@
 from uuid import uuid4
+from bson.decimal128 import Decimal128
+from pymongo.errors import DuplicateKeyError
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
 from datetime import timedelta
 
+def decimal_to_float(value):
+    """Convert a Decimal, Decimal128 or numeric string as stored by djongo to float."""
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    return float(value)
+
 # User Manager
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -95,8 +103,14 @@ class Apartment(models.Model):
     available_beds = models.IntegerField(default=0)
     hostel_type = models.CharField(max_length=10, choices=HOSTEL_TYPE_CHOICES, null=True, blank=True)
     food = models.ManyToManyField(Food)  # Many-to-Many relationship
+    # Plain numeric copy of rent so range filters run as indexed MongoDB queries
+    rent_value = models.FloatField(null=True, blank=True, editable=False, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    def save(self, *args, **kwargs):
+        self.rent_value = decimal_to_float(self.rent)
+        super().save(*args, **kwargs)
     
 
 class ApartmentImage(models.Model):
@@ -104,6 +118,10 @@ class ApartmentImage(models.Model):
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE)
     image_path = models.TextField()
     is_primary = models.BooleanField(default=False)
+    # GridFS ids of the resized copies, filled on upload or on first request
+    thumbnail_path = models.TextField(null=True, blank=True)
+    card_path = models.TextField(null=True, blank=True)
+    full_path = models.TextField(null=True, blank=True)
 
 class SearchFilter(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -128,6 +146,8 @@ class Booking(models.Model):
     booking_date = models.DateTimeField(auto_now_add=True)
     checkout_date = models.DateTimeField(default=default_checkout_date)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="active")
+    # Set while the booking holds a bed for checkout; cleared on payment or expiry
+    hold_expires_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
 
 
 class Payment(models.Model):
@@ -140,13 +160,52 @@ class Payment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Plain double copy of amount so revenue can be summed by the database
+    amount_value = models.FloatField(null=True, blank=True, editable=False)
     razorpay_order_id = models.CharField(max_length=100, null=True, blank=True)
     razorpay_payment_id = models.CharField(max_length=100, null=True, blank=True)
     razorpay_signature = models.CharField(max_length=256, null=True, blank=True)
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICES, default='pending')
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES, default='razorpay')
+    # Repeated create requests with the same key return this payment instead of a new order
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True, db_index=True)
+    payment_url = models.URLField(max_length=500, null=True, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        self.amount_value = decimal_to_float(self.amount)
+        super().save(*args, **kwargs)
+
+
+class PaymentEvent(models.Model):
+    """A verified Razorpay webhook delivery, queued for settlement."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('processed', 'Processed'),
+        ('failed', 'Failed'),
+    ]
+
+    # Razorpay's X-Razorpay-Event-Id; redeliveries of one event share it
+    event_id = models.CharField(max_length=100, primary_key=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    # Due time while pending, lease expiry while a worker is processing
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'], name='payment_event_queue_idx'
+            ),
+        ]
+
 
 class Wishlist(models.Model):
     wishlist_id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
@@ -179,6 +238,87 @@ class Chat(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['sender', 'receiver', 'timestamp'], name='chat_pair_timestamp_idx'),
+        ]
+
+class ConversationManager(models.Manager):
+    def for_pair(self, first_user_id, second_user_id):
+        """Return the conversation between two users, creating it if needed."""
+        user_low_id, user_high_id = sorted([first_user_id, second_user_id])
+        conversation, _ = self.get_or_create(
+            user_low_id=user_low_id, user_high_id=user_high_id
+        )
+        return conversation
+
+    def record_message(self, chat):
+        """Fold a newly written Chat row into its conversation summary.
+
+        One upsert with $inc, since djongo cannot translate F() updates.
+        """
+        from .mongo import collection
+
+        user_low_id, user_high_id = sorted([chat.sender_id, chat.receiver_id])
+        unread_field = 'unread_low' if chat.receiver_id == user_low_id else 'unread_high'
+        read_field = 'unread_high' if unread_field == 'unread_low' else 'unread_low'
+        for attempt in range(2):
+            try:
+                collection(self.model._meta.db_table).update_one(
+                    {'user_low_id': user_low_id, 'user_high_id': user_high_id},
+                    {
+                        '$set': {
+                            'last_message': chat.message[:Conversation.PREVIEW_LENGTH],
+                            'last_sender_id': chat.sender_id,
+                            'last_timestamp': chat.timestamp,
+                        },
+                        '$inc': {unread_field: 1},
+                        '$setOnInsert': {'conversation_id': uuid4(), read_field: 0},
+                    },
+                    upsert=True,
+                )
+                return
+            except DuplicateKeyError:
+                # A concurrent first message created the row; the retry updates it
+                if attempt:
+                    raise
+
+    def mark_read(self, reader_id, other_user_id):
+        """Reset the reader's unread count for the conversation with other_user_id."""
+        conversation = self.for_pair(reader_id, other_user_id)
+        self.filter(pk=conversation.pk).update(
+            **{conversation.unread_field_for(reader_id): 0}
+        )
+
+
+# Denormalized summary of the messages between two users, one row per pair
+class Conversation(models.Model):
+    PREVIEW_LENGTH = 255
+
+    conversation_id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    # Participants are stored with the lower user id first so each pair has one row
+    user_low = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    user_high = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    last_message = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default='')
+    last_sender = models.ForeignKey(User, related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    unread_low = models.IntegerField(default=0)
+    unread_high = models.IntegerField(default=0)
+
+    objects = ConversationManager()
+
+    class Meta:
+        unique_together = ('user_low', 'user_high')
+        indexes = [
+            models.Index(fields=['user_low', '-last_timestamp'], name='conversation_low_recent_idx'),
+            models.Index(fields=['user_high', '-last_timestamp'], name='conversation_high_recent_idx'),
+        ]
+
+    def unread_field_for(self, user_id):
+        return 'unread_low' if user_id == self.user_low_id else 'unread_high'
+
+    def other_user_id(self, user_id):
+        return self.user_high_id if user_id == self.user_low_id else self.user_low_id
+
 
 class Notification(models.Model):
     notification_id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
@@ -240,4 +380,52 @@ class OTPVerification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    email_id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    # Due time while pending, lease expiry while a worker is sending
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.status})"
+
+
+class DailyMetrics(models.Model):
+    """Per-day counters for the admin dashboard, kept current by signals."""
+
+    metrics_id = models.UUIDField(default=uuid4, primary_key=True, editable=False)
+    date = models.DateField(unique=True)
+    bookings_created = models.IntegerField(default=0)
+    bookings_cancelled = models.IntegerField(default=0)
+    payments_completed = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+    new_users = models.IntegerField(default=0)
+    new_listings = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.date)
@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from pymongo import monitoring
+
+from .services import services
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage and checkout wait time for the process.
+
+    Registered globally in RentalAppConfig.ready(), before any client is
+    created. Callbacks run in the thread doing the checkout, so the wait
+    start can be kept in a thread local.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+            self.max_checked_out = 0
+            self.checkouts = 0
+            self.failed_checkouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def _waited(self):
+        started, self._local.started = getattr(self._local, "started", None), None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def _record_wait(self, waited):
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self._record_wait(waited)
+
+    def connection_check_out_failed(self, event):
+        waited = self._waited()
+        with self._lock:
+            self.failed_checkouts += 1
+            self._record_wait(waited)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.failed_checkouts
+            return {
+                "open_connections": self.open,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "avg_wait_ms": self.wait_total / attempts * 1000 if attempts else 0.0,
+                "max_wait_ms": self.wait_max * 1000,
+            }
+
+
+pool_monitor = PoolMonitor()
+
+
+def shared_client():
+    """The process's MongoClient, the same one djongo uses for the ORM.
+
+    djongo keeps one client per database name, built from
+    DATABASES["default"]["CLIENT"], so the pool size, timeouts and
+    read/write concerns configured there apply to GridFS and raw
+    collection access as well.
+    """
+    connection = connections["default"]
+    connection.ensure_connection()
+    return connection.client_connection
+
+
+def database_name():
+    return settings.DATABASES["default"]["NAME"]
+
+
+def collection(name):
+    """A raw pymongo collection on the shared client."""
+    return services.get("mongo_db")[name]
+
+
+def pool_stats():
+    """Pool counters plus the configured limits, for the admin dashboard."""
+    options = settings.DATABASES["default"].get("CLIENT", {})
+    return {
+        "max_pool_size": options.get("maxPoolSize", 100),
+        "min_pool_size": options.get("minPoolSize", 0),
+        "wait_queue_timeout_ms": options.get("waitQueueTimeoutMS"),
+        **pool_monitor.snapshot(),
+    }
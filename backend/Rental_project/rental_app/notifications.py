@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Notification
+from .realtime import push_on_commit
+from .serializers import NotificationSerializer
+
+
+def unread_count_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id):
+    """Unread notifications of a user, counted once and then kept in the cache."""
+    return cache.get_or_set(
+        unread_count_key(user_id),
+        lambda: Notification.objects.filter(user_id=user_id, read_status=0).count(),
+        settings.NOTIFICATION_COUNT_TIMEOUT,
+    )
+
+
+def _adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(unread_count_key(user_id), delta)
+    except ValueError:
+        pass  # Not cached; the next read counts from the database
+
+
+def notify(user_id, message):
+    """Create one notification; the post_save receiver pushes it to open sockets."""
+    notification = Notification.objects.create(user_id=user_id, message=message)
+    _adjust_unread_count(user_id, 1)
+    return notification
+
+
+def notify_many(user_ids, message):
+    """Fan one message out to many users with a single bulk insert.
+
+    The socket pushes go out as one background batch after commit, the
+    same way the post_save receiver pushes a single notification, so a
+    broadcast to every tenant does not hold the request for a channel
+    layer round trip per recipient.
+    """
+    notifications = Notification.objects.bulk_create(
+        [Notification(user_id=user_id, message=message) for user_id in user_ids]
+    )
+    # bulk_create skips post_save, so push and count here instead
+    events = []
+    for notification in notifications:
+        _adjust_unread_count(notification.user_id, 1)
+        events.append(
+            (
+                notification.user_id,
+                "notification.created",
+                NotificationSerializer(notification).data,
+            )
+        )
+    push_on_commit(events)
+    return notifications
+
+
+def mark_read(user_id, notifications):
+    """Mark a user's notifications read and lower the cached counter to match."""
+    updated = notifications.filter(read_status=0).update(read_status=1)
+    if updated:
+        _adjust_unread_count(user_id, -updated)
+    return updated
@@ -0,0 +1,183 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Claimed messages whose worker died are picked up again after this long
+SEND_LEASE = timedelta(minutes=5)
+
+
+def queue_email(subject, body, recipient, from_email=None):
+    """Persist an email for background delivery.
+
+    The process_email_outbox command sends it; with EMAIL_OUTBOX_AUTOSTART
+    the in-process worker pool is woken to send it right away instead.
+    """
+    email = OutboundEmail.objects.create(
+        subject=subject, body=body, recipient=recipient, from_email=from_email
+    )
+    if settings.EMAIL_OUTBOX_AUTOSTART:
+        get_worker_pool().wake()
+    return email
+
+
+def claim_batch(size):
+    """Lease up to size due messages to the caller.
+
+    Each row is claimed with a conditional update, so concurrent workers
+    (threads or processes) never send the same message twice.
+    """
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(
+        status__in=["pending", "sending"], next_attempt_at__lte=now
+    ).order_by("next_attempt_at")
+    claimed = []
+    for email_id in due.values_list("email_id", flat=True)[:size]:
+        taken = OutboundEmail.objects.filter(
+            email_id=email_id,
+            status__in=["pending", "sending"],
+            next_attempt_at__lte=now,
+        ).update(status="sending", next_attempt_at=now + SEND_LEASE)
+        if taken:
+            claimed.append(email_id)
+    return list(OutboundEmail.objects.filter(email_id__in=claimed))
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ... capped at one hour."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, 3600))
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = "failed"
+        logger.error("Giving up on email %s: %s", email.email_id, error)
+    else:
+        email.status = "pending"
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_batch(emails, connection):
+    """Send claimed messages over one shared connection; returns how many went out."""
+    try:
+        # No-op while the session from the previous batch is still open
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            record_failure(email, e)
+        return 0
+
+    sent = 0
+    for email in emails:
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email,
+            to=[email.recipient],
+            connection=connection,
+        )
+        try:
+            message.send()
+        except Exception as e:
+            record_failure(email, e)
+            # The server may have dropped the session; the next batch reconnects
+            connection.close()
+            continue
+
+        email.attempts += 1
+        email.status = "sent"
+        email.sent_at = timezone.now()
+        email.last_error = ""
+        email.save(update_fields=["attempts", "status", "sent_at", "last_error"])
+        sent += 1
+    return sent
+
+
+def process_outbox(batch_size=None):
+    """Drain every due message, reusing one SMTP connection; returns the sent count."""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = 0
+    connection = None
+    try:
+        while True:
+            emails = claim_batch(batch_size)
+            if not emails:
+                break
+            if connection is None:
+                connection = get_connection()
+            sent += send_batch(emails, connection)
+    finally:
+        if connection is not None:
+            connection.close()
+    return sent
+
+
+class OutboxWorkerPool:
+    """Daemon threads that drain the outbox when woken or every poll interval."""
+
+    def __init__(self, size, poll_interval):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.size):
+            thread = threading.Thread(
+                target=self._run, name=f"email-outbox-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            close_old_connections()
+            try:
+                process_outbox()
+            except Exception:
+                logger.exception("Email outbox worker failed")
+            finally:
+                close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Start the in-process worker pool on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OutboxWorkerPool(
+                settings.EMAIL_OUTBOX_WORKERS, settings.EMAIL_OUTBOX_POLL_INTERVAL
+            )
+            _pool.start()
+    return _pool
@@ -0,0 +1,138 @@
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class ApartmentCursorPagination(CursorPagination):
+    """Keyset pagination over apartments, newest first.
+
+    Listing views only paginate when the client sends ``cursor`` or
+    ``page_size``, so existing callers keep receiving the full list.
+    ``count=true`` adds the total number of matching apartments, which
+    costs an extra count query and is skipped otherwise.
+
+    DRF keys the cursor on the first ordering field only and pages
+    through ties with an offset, which repeats or skips apartments that
+    share a created_at (MongoDB stores milliseconds) when rows change
+    between requests. The cursor here is the (created_at, apartment_id)
+    pair instead, which is unique, so a position never needs an offset.
+    """
+
+    ordering = ("-created_at", "-apartment_id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or cls.page_size_query_param in request.query_params
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            created_at, apartment_id = instance["created_at"], instance["apartment_id"]
+        else:
+            created_at, apartment_id = instance.created_at, instance.apartment_id
+        return f"{created_at.isoformat()}|{apartment_id}"
+
+    def position_filter(self, position, before):
+        """Rows strictly before (or after) a position in (created_at, apartment_id) order."""
+        try:
+            created_at, apartment_id = position.split("|")
+            created_at = parse_datetime(created_at)
+            apartment_id = uuid.UUID(apartment_id)
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        lookup = "lt" if before else "gt"
+        return Q(**{f"created_at__{lookup}": created_at}) | Q(
+            created_at=created_at, **{f"apartment_id__{lookup}": apartment_id}
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.total_count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.total_count = queryset.count()
+
+        # DRF's own flow, with the single-field position filter swapped for
+        # the compound one; positions are unique, so the offset stays 0
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by("created_at", "apartment_id")
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = queryset.filter(
+                self.position_filter(current_position, before=not reverse)
+            )
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = results[: self.page_size]
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[-1], self.ordering)
+            if self.page
+            else self.next_position
+        )
+        return self.encode_cursor(Cursor(0, False, position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self._get_position_from_instance(self.page[0], self.ordering)
+            if self.page
+            else self.previous_position
+        )
+        return self.encode_cursor(Cursor(0, True, position))
+
+    def get_paginated_data(self, data):
+        paginated = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.total_count is not None:
+            paginated["count"] = self.total_count
+        return paginated
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,91 @@
+"""LRU cache for djongo's SQL parsing step.
+
+djongo turns every ORM query into SQL and runs it through sqlparse before
+translating the token tree into a MongoDB query. Django always passes
+values as parameters, and djongo rewrites them to ``%(n)s`` placeholders
+before parsing, so the parsed tree depends only on the query shape. The
+placeholders are resolved against the parameters afterwards, on every
+execution, so one parsed tree serves all queries of that shape.
+
+djongo regroups and annotates the tokens while translating, so callers
+never get the cached tree itself: each one receives a copy of its nodes.
+Token types are module-level singletons compared by identity and values
+are strings, so the copy shares both and only clones the tree structure.
+"""
+import copy
+import functools
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from djongo.sql2mongo import query as djongo_query
+
+_original_parse = djongo_query.sqlparse
+_cached_parse = None
+_lock = threading.Lock()
+
+
+def copy_tree(token, parent=None):
+    """A private copy of a parsed token tree, sharing token types and values."""
+    clone = copy.copy(token)
+    clone.parent = parent
+    if token.is_group:
+        clone.tokens = [copy_tree(child, clone) for child in token.tokens]
+    return clone
+
+
+def copying(parse):
+    """Wrap a caching parser so that every caller gets its own copy of the tree."""
+
+    def parse_copy(sql):
+        return tuple(copy_tree(statement) for statement in parse(sql))
+
+    return parse_copy
+
+
+def install():
+    """Route djongo's parser through a cache of QUERY_PARSE_CACHE_SIZE shapes."""
+    global _cached_parse
+    with _lock:
+        _cached_parse = functools.lru_cache(maxsize=settings.QUERY_PARSE_CACHE_SIZE)(
+            _original_parse
+        )
+        djongo_query.sqlparse = copying(_cached_parse)
+
+
+def uninstall():
+    global _cached_parse
+    with _lock:
+        _cached_parse = None
+        djongo_query.sqlparse = _original_parse
+
+
+def configure():
+    if settings.QUERY_PARSE_CACHE and settings.QUERY_PARSE_CACHE_SIZE > 0:
+        install()
+    else:
+        uninstall()
+
+
+def parse_cache_stats():
+    """Hit/miss counters of this process since the cache was installed."""
+    parse = _cached_parse
+    if parse is None:
+        return {"enabled": False}
+    info = parse.cache_info()
+    total = info.hits + info.misses
+    return {
+        "enabled": True,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / total if total else 0.0,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+@receiver(setting_changed)
+def reconfigure(setting, **kwargs):
+    if setting in ("QUERY_PARSE_CACHE", "QUERY_PARSE_CACHE_SIZE"):
+        configure()
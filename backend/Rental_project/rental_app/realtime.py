@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """Channel layer group holding every open socket of one user."""
+    return f"user.{user_id}"
+
+
+def push_to_user(user_id, event_type, data):
+    """Deliver a JSON-serializable payload to every socket the user has open.
+
+    ``event_type`` is a dotted name such as ``chat.message``; consumers
+    dispatch it to the handler of the same name with dots as underscores.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        user_group(user_id), {"type": event_type, "data": data}
+    )
+
+
+def push_to_users(events):
+    """Deliver (user_id, event_type, data) events with concurrent group sends."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not events:
+        return
+
+    async def send_all():
+        await asyncio.gather(
+            *(
+                channel_layer.group_send(
+                    user_group(user_id), {"type": event_type, "data": data}
+                )
+                for user_id, event_type, data in events
+            )
+        )
+
+    async_to_sync(send_all)()
+
+
+def _push_batch(events):
+    try:
+        push_to_users(events)
+    except Exception:
+        logger.exception("Realtime push of %d events failed", len(events))
+
+
+def push_in_background(events):
+    """Send a batch of pushes from one daemon thread so the caller does not wait."""
+    thread = threading.Thread(
+        target=_push_batch, args=(list(events),), name="realtime-push", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def push_on_commit(events):
+    """Push a batch in the background once the rows it describes are committed.
+
+    Outside an atomic block this starts the push straight away.
+    """
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: push_in_background(events))
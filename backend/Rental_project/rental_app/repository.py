@@ -0,0 +1,190 @@
+"""Native pymongo reads for the hottest endpoints.
+
+djongo renders every ORM query to SQL and parses it back into a MongoDB
+query, which costs more CPU than the lookup itself for simple filters.
+The functions here query the collections directly, project only the
+serialized fields, and format values with the serializer's own fields so
+the JSON matches the ORM path exactly. Views fall back to the ORM when
+settings.NATIVE_READS is off.
+"""
+import datetime
+
+from bson.decimal128 import Decimal128
+from django.utils import timezone
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+from .models import Apartment, Chat, Conversation, HostelApproval, Notification, User
+from .mongo import collection
+from .serializers import (
+    ApartmentListSerializer,
+    ApartmentSerializer,
+    ChatSerializer,
+    ConversationSerializer,
+    NotificationSerializer,
+)
+
+_layouts = {}
+
+
+def document_layout(serializer_class):
+    """(name, field, document key) per serialized field; key is None for many-to-many."""
+    if serializer_class not in _layouts:
+        model = serializer_class.Meta.model
+        layout = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, ManyRelatedField):
+                layout.append((name, field, None))
+            else:
+                layout.append((name, field, model._meta.get_field(field.source).column))
+        _layouts[serializer_class] = layout
+    return _layouts[serializer_class]
+
+
+def projection(serializer_class):
+    return {key: 1 for _, _, key in document_layout(serializer_class) if key}
+
+
+def python_value(value):
+    """Undo the storage types djongo converts on read: Decimal128 and naive UTC datetimes."""
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    if isinstance(value, datetime.datetime) and timezone.is_naive(value):
+        return timezone.make_aware(value, datetime.timezone.utc)
+    return value
+
+
+def represent(serializer_class, document, many_to_many=None):
+    """Serialize a raw document the way serializer_class serializes the model instance."""
+    data = {}
+    for name, field, key in document_layout(serializer_class):
+        if key is None:
+            data[name] = (many_to_many or {}).get(name, [])
+            continue
+        value = document.get(key)
+        if value is None or isinstance(field, RelatedField):
+            # Related fields render the stored primary key as-is
+            data[name] = value
+        else:
+            data[name] = field.to_representation(python_value(value))
+    return data
+
+
+def food_ids_by_apartment(apartment_ids):
+    through = Apartment.food.through
+    food_ids = {apartment_id: [] for apartment_id in apartment_ids}
+    for row in collection(through._meta.db_table).find(
+        {"apartment_id": {"$in": list(apartment_ids)}},
+        {"_id": 0, "apartment_id": 1, "food_id": 1},
+    ):
+        food_ids[row["apartment_id"]].append(row["food_id"])
+    return food_ids
+
+
+def approved_apartments():
+    """Public listing cards of approved apartments (ApartmentListSerializer shape)."""
+    approved_ids = collection(HostelApproval._meta.db_table).distinct(
+        "apartment_id", {"status": "approved"}
+    )
+    if not approved_ids:
+        return []
+
+    documents = list(
+        collection(Apartment._meta.db_table).find(
+            {"apartment_id": {"$in": approved_ids}},
+            projection(ApartmentListSerializer),
+        )
+    )
+    food_ids = food_ids_by_apartment([doc["apartment_id"] for doc in documents])
+    return [
+        represent(
+            ApartmentListSerializer, doc, {"food": food_ids[doc["apartment_id"]]}
+        )
+        for doc in documents
+    ]
+
+
+def apartment_detail(apartment_id):
+    """One apartment in ApartmentSerializer shape, or None when it does not exist."""
+    document = collection(Apartment._meta.db_table).find_one(
+        {"apartment_id": apartment_id}, projection(ApartmentSerializer)
+    )
+    if document is None:
+        return None
+    food_ids = food_ids_by_apartment([apartment_id])
+    return represent(ApartmentSerializer, document, {"food": food_ids[apartment_id]})
+
+
+def unread_notifications(user_id):
+    """Unread notifications of a user in NotificationSerializer shape."""
+    return [
+        represent(NotificationSerializer, doc)
+        for doc in collection(Notification._meta.db_table).find(
+            {"user_id": user_id, "read_status": 0}, projection(NotificationSerializer)
+        )
+    ]
+
+
+def messages_between(user_id, other_user_id):
+    """Both directions of a chat, newest first like Chat's default ordering."""
+    documents = collection(Chat._meta.db_table).find(
+        {
+            "$or": [
+                {"sender_id": user_id, "receiver_id": other_user_id},
+                {"sender_id": other_user_id, "receiver_id": user_id},
+            ]
+        },
+        projection(ChatSerializer),
+    ).sort("timestamp", -1)
+    return [represent(ChatSerializer, doc) for doc in documents]
+
+
+def inbox(user_id):
+    """Conversations of a user, most recently active first (ConversationSerializer shape)."""
+    conversations = list(
+        collection(Conversation._meta.db_table).find(
+            {"$or": [{"user_low_id": user_id}, {"user_high_id": user_id}]},
+            {
+                "_id": 0,
+                "conversation_id": 1,
+                "user_low_id": 1,
+                "user_high_id": 1,
+                "last_message": 1,
+                "last_sender_id": 1,
+                "last_timestamp": 1,
+                "unread_low": 1,
+                "unread_high": 1,
+            },
+        ).sort("last_timestamp", -1)
+    )
+
+    def other_id(doc):
+        return doc["user_high_id"] if doc["user_low_id"] == user_id else doc["user_low_id"]
+
+    names = {
+        doc["id"]: doc["name"]
+        for doc in collection(User._meta.db_table).find(
+            {"id": {"$in": list({other_id(doc) for doc in conversations})}},
+            {"_id": 0, "id": 1, "name": 1},
+        )
+    }
+    timestamp_field = ConversationSerializer().fields["last_timestamp"]
+
+    rows = []
+    for doc in conversations:
+        is_low = doc["user_low_id"] == user_id
+        last_timestamp = python_value(doc.get("last_timestamp"))
+        rows.append(
+            {
+                "conversation_id": str(doc["conversation_id"]),
+                "other_user": {"id": other_id(doc), "name": names.get(other_id(doc))},
+                "last_message": doc.get("last_message", ""),
+                "last_sender": doc.get("last_sender_id"),
+                "last_timestamp": (
+                    timestamp_field.to_representation(last_timestamp)
+                    if last_timestamp
+                    else None
+                ),
+                "unread_count": doc["unread_low"] if is_low else doc["unread_high"],
+            }
+        )
+    return rows
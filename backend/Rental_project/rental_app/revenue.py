@@ -0,0 +1,72 @@
+from .models import Apartment, Payment
+
+REVENUE_GROUPS = ("owner", "apartment", "month")
+
+# Expression for each group key, evaluated on payment documents
+GROUP_EXPRESSIONS = {
+    "owner": "$apartment.owner_id",
+    "apartment": "$apartment_id",
+    "month": {"$dateToString": {"format": "%Y-%m", "date": "$timestamp"}},
+}
+
+
+def revenue_pipeline(group_by=(), apartment_ids=None):
+    """$group pipeline summing paid amounts, optionally per owner/apartment/month."""
+    match = {"payment_status": "paid"}
+    if apartment_ids is not None:
+        match["apartment_id"] = {"$in": list(apartment_ids)}
+
+    pipeline = [{"$match": match}]
+    if "owner" in group_by:
+        pipeline += [
+            {
+                "$lookup": {
+                    "from": Apartment._meta.db_table,
+                    "localField": "apartment_id",
+                    "foreignField": "apartment_id",
+                    "as": "apartment",
+                }
+            },
+            {"$unwind": "$apartment"},
+        ]
+
+    pipeline += [
+        {
+            "$group": {
+                "_id": {name: GROUP_EXPRESSIONS[name] for name in group_by},
+                "total": {"$sum": "$amount_value"},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"_id": 1}},
+    ]
+    return pipeline
+
+
+def revenue_totals(db, group_by=(), apartment_ids=None):
+    """Total paid revenue and per-group breakdown in one aggregation round trip.
+
+    Returns ``(total, count, groups)`` where each group is a dict of the
+    requested keys plus ``total`` and ``count``.
+    """
+    collection = db[Payment._meta.db_table]
+    groups = []
+    for row in collection.aggregate(revenue_pipeline(group_by, apartment_ids)):
+        group = {name: row["_id"].get(name) for name in group_by}
+        if group.get("apartment") is not None:
+            group["apartment"] = str(group["apartment"])
+        group.update(total=row["total"], count=row["count"])
+        groups.append(group)
+
+    total = sum(group["total"] for group in groups)
+    count = sum(group["count"] for group in groups)
+    return total, count, groups
+
+
+def parse_group_by(value):
+    """Split a comma separated group_by parameter; raises ValueError on unknown keys."""
+    group_by = tuple(name for name in (value or "").split(",") if name)
+    unknown = set(group_by) - set(REVENUE_GROUPS)
+    if unknown:
+        raise ValueError(f"Unknown group_by value(s): {', '.join(sorted(unknown))}")
+    return group_by
@@ -7,6 +7,7 @@ from .models import (
     Food,
     SearchFilter,
     Chat,
+    Conversation,
     Booking,
     Payment,
     Notification,
@@ -76,6 +77,34 @@ class ApartmentSerializer(serializers.ModelSerializer):
         return apartment
 
 
+class ApartmentListSerializer(serializers.ModelSerializer):
+    """Read-only apartment card for public listings; expects ``food`` prefetched."""
+    food = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+
+    class Meta:
+        model = Apartment
+        fields = [
+            "apartment_id",
+            "owner",
+            "title",
+            "location",
+            "latitude",
+            "longitude",
+            "rent",
+            "duration",
+            "room_sharing_type",
+            "bhk",
+            "parking_available",
+            "rating",
+            "total_beds",
+            "available_beds",
+            "hostel_type",
+            "food",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
 class ApartmentImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ApartmentImage
@@ -101,6 +130,35 @@ class ChatSerializer(serializers.ModelSerializer):
         }
 
 
+class ConversationSerializer(serializers.ModelSerializer):
+    """Inbox row as seen by ``context["user"]``; expects both participants selected."""
+    other_user = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = [
+            "conversation_id",
+            "other_user",
+            "last_message",
+            "last_sender",
+            "last_timestamp",
+            "unread_count",
+        ]
+
+    def get_other_user(self, conversation):
+        if conversation.user_low_id == self.context["user"].id:
+            other = conversation.user_high
+        else:
+            other = conversation.user_low
+        return {"id": other.id, "name": other.name}
+
+    def get_unread_count(self, conversation):
+        return getattr(
+            conversation, conversation.unread_field_for(self.context["user"].id)
+        )
+
+
 class BookingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
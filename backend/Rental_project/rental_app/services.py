@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceRegistry:
+    """Process-wide external clients, each created on first use.
+
+    Factories run at most once per name, under a per-service lock, so
+    concurrent first requests share one client and a slow service never
+    blocks access to the others. Nothing connects at import time.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name, factory):
+        with self._registry_lock:
+            self._factories[name] = factory
+            self._locks[name] = threading.Lock()
+
+    def get(self, name):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._locks[name]:
+            if name not in self._instances:
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_ready(self, name):
+        return name in self._instances
+
+    def reset(self, name):
+        """Forget a client so the next get() builds a new one (tests, settings changes)."""
+        with self._locks[name]:
+            self._instances.pop(name, None)
+
+    def warm_up(self, *names):
+        """Create the named services (all when none given) now; returns seconds per service.
+
+        Failures are logged rather than raised, so an unreachable optional
+        service does not stop a worker from booting.
+        """
+        timings = {}
+        for name in names or list(self._factories):
+            started = time.perf_counter()
+            try:
+                self.get(name)
+            except Exception:
+                logger.exception("Warm-up of %s failed", name)
+                continue
+            timings[name] = time.perf_counter() - started
+        return timings
+
+
+def create_mongo_client():
+    from .mongo import shared_client
+
+    return shared_client()
+
+
+def create_mongo_db():
+    from .mongo import database_name
+
+    return services.get("mongo")[database_name()]
+
+
+def create_gridfs():
+    from gridfs import GridFS
+
+    return GridFS(services.get("mongo_db"))
+
+
+def create_firebase_app():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    if firebase_admin._apps:
+        return firebase_admin.get_app()
+    return firebase_admin.initialize_app(
+        credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
+    )
+
+
+def create_gradio_client():
+    from gradio_client import Client
+
+    return Client("alameenas/gym_assastant")
+
+
+services = ServiceRegistry()
+services.register("mongo", create_mongo_client)
+services.register("mongo_db", create_mongo_db)
+services.register("gridfs", create_gridfs)
+services.register("firebase", create_firebase_app)
+services.register("gradio", create_gradio_client)
+services.register(
+    "payment_gateway", lambda: import_string(settings.PAYMENT_GATEWAY)()
+)
+
+
+def warm_up_from_settings():
+    """Hook for wsgi/asgi: eagerly create the services listed in WARM_UP_SERVICES."""
+    if settings.WARM_UP_SERVICES:
+        timings = services.warm_up(*settings.WARM_UP_SERVICES)
+        logger.info("Warmed up services: %s", timings)
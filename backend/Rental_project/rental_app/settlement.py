@@ -0,0 +1,223 @@
+import asyncio
+import json
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.utils import timezone
+
+from .gateway import get_gateway
+from .inventory import release_bed, reserve_bed, take_hold
+from .metrics import bump, metric_day, record_payment_completed
+from .models import Booking, Payment, PaymentEvent
+from .mongo import collection
+
+logger = logging.getLogger(__name__)
+
+# Claimed events whose worker died are picked up again after this long
+EVENT_LEASE = timedelta(minutes=5)
+
+SETTLING_EVENTS = {"payment.captured", "order.paid", "payment_link.paid"}
+FAILING_EVENTS = {"payment.failed"}
+
+
+def confirm_booking(booking_id):
+    """Confirm a paid booking on its held bed, or a free one if the hold lapsed.
+
+    Safe to repeat: a booking that is no longer active is left as it is,
+    and only the caller whose conditional update moves it out of active
+    keeps the bed it took. Returns the booking status.
+    """
+    booking = Booking.objects.get(booking_id=booking_id)
+    if booking.status != "active":
+        return booking.status
+
+    has_bed = take_hold(booking) or reserve_bed(booking.apartment_id)
+    new_status = "confirmed" if has_bed else "cancelled"
+    claimed = collection(Booking._meta.db_table).update_one(
+        {"booking_id": booking.booking_id, "status": "active"},
+        {"$set": {"status": new_status, "hold_expires_at": None}},
+    ).modified_count
+    if not claimed:
+        # A concurrent confirmation or cancellation got there first
+        if has_bed:
+            release_bed(booking.apartment_id)
+        return Booking.objects.values_list("status", flat=True).get(pk=booking.pk)
+
+    if new_status == "cancelled":
+        # The raw update skips the post_save counter
+        bump(metric_day(), bookings_cancelled=1)
+    return new_status
+
+
+def settle_payment(order_id, razorpay_payment_id):
+    """Record a captured payment and confirm its booking, exactly once.
+
+    The browser callback, webhooks and reconciliation may all report the
+    same payment; only the caller whose conditional update flips the row
+    from pending counts it. Confirming the booking is idempotent, so a
+    retry of a settlement that failed half way resumes it. Returns the
+    booking status, or None when the order is unknown, not paid or was
+    already settled.
+    """
+    updated = Payment.objects.filter(
+        razorpay_order_id=order_id, payment_status="pending"
+    ).update(payment_status="paid", razorpay_payment_id=razorpay_payment_id)
+
+    payment = Payment.objects.filter(razorpay_order_id=order_id).first()
+    if payment is None or payment.payment_status != "paid":
+        return None
+    if not updated and not Booking.objects.filter(
+        booking_id=payment.booking_id, status="active"
+    ).exists():
+        return None
+
+    try:
+        return confirm_booking(payment.booking_id)
+    finally:
+        if updated:
+            # update() skips post_save, so count the payment here; never raises
+            record_payment_completed(payment.amount_value)
+
+
+def fail_payment(order_id):
+    return Payment.objects.filter(
+        razorpay_order_id=order_id, payment_status="pending"
+    ).update(payment_status="failed")
+
+
+def record_event(event_id, event_type, payload):
+    """Queue a webhook delivery; returns False for a redelivery of a known event."""
+    _, created = PaymentEvent.objects.get_or_create(
+        event_id=event_id,
+        defaults={"event_type": event_type, "payload": payload},
+    )
+    return created
+
+
+def event_order_id(event):
+    entities = event.get("payload", {})
+    link = entities.get("payment_link", {}).get("entity")
+    if link:
+        # Links are created with our order id as their reference
+        return link.get("reference_id")
+    return entities.get("payment", {}).get("entity", {}).get("order_id")
+
+
+def apply_event(event):
+    event_type = event.get("event")
+    if event_type not in SETTLING_EVENTS | FAILING_EVENTS:
+        return
+
+    order_id = event_order_id(event)
+    if not order_id:
+        return
+    if event_type in FAILING_EVENTS:
+        fail_payment(order_id)
+    else:
+        payment_id = event["payload"]["payment"]["entity"]["id"]
+        settle_payment(order_id, payment_id)
+
+
+def claim_events(size):
+    """Lease up to size due events with conditional updates, like the email outbox."""
+    now = timezone.now()
+    due = PaymentEvent.objects.filter(
+        status__in=["pending", "processing"], next_attempt_at__lte=now
+    ).order_by("next_attempt_at")
+    claimed = []
+    for event_id in due.values_list("event_id", flat=True)[:size]:
+        taken = PaymentEvent.objects.filter(
+            event_id=event_id,
+            status__in=["pending", "processing"],
+            next_attempt_at__lte=now,
+        ).update(status="processing", next_attempt_at=now + EVENT_LEASE)
+        if taken:
+            claimed.append(event_id)
+    return list(PaymentEvent.objects.filter(event_id__in=claimed))
+
+
+def process_event(event):
+    event.attempts += 1
+    try:
+        apply_event(json.loads(event.payload))
+    except Exception as e:
+        logger.exception("Payment event %s failed", event.event_id)
+        event.last_error = str(e)
+        if event.attempts >= settings.PAYMENT_EVENT_MAX_ATTEMPTS:
+            event.status = "failed"
+        else:
+            event.status = "pending"
+            event.next_attempt_at = timezone.now() + timedelta(
+                seconds=30 * 2 ** (event.attempts - 1)
+            )
+    else:
+        event.status = "processed"
+        event.processed_at = timezone.now()
+    event.save()
+
+
+def process_payment_events(batch_size=None):
+    """Apply every due webhook event; returns how many were handled."""
+    batch_size = batch_size or settings.PAYMENT_EVENT_BATCH_SIZE
+    handled = 0
+    while True:
+        events = claim_events(batch_size)
+        if not events:
+            return handled
+        for event in events:
+            process_event(event)
+        handled += len(events)
+
+
+async def find_captured_payments(order_ids):
+    """Ask the gateway about a batch of orders concurrently."""
+    gateway = get_gateway()
+    results = await asyncio.gather(
+        *(gateway.find_captured_payment(order_id) for order_id in order_ids),
+        return_exceptions=True,
+    )
+    return dict(zip(order_ids, results))
+
+
+def reconcile_pending_payments(batch_size=None, min_age=None):
+    """Settle pending payments the gateway reports as captured.
+
+    Covers payments whose callback never arrived (tab closed) and whose
+    webhook was lost. Only payments older than ``min_age`` are checked so
+    the normal paths get the first chance. Returns how many were settled.
+    """
+    batch_size = batch_size or settings.PAYMENT_RECONCILE_BATCH_SIZE
+    if min_age is None:
+        min_age = timedelta(seconds=settings.PAYMENT_RECONCILE_MIN_AGE)
+    order_ids = (
+        Payment.objects.filter(
+            payment_status="pending",
+            razorpay_order_id__isnull=False,
+            timestamp__lte=timezone.now() - min_age,
+        )
+        .order_by("timestamp")
+        .values_list("razorpay_order_id", flat=True)
+    )
+
+    settled = 0
+    batch = []
+    for order_id in order_ids.iterator(chunk_size=batch_size):
+        batch.append(order_id)
+        if len(batch) == batch_size:
+            settled += settle_batch(batch)
+            batch = []
+    if batch:
+        settled += settle_batch(batch)
+    return settled
+
+
+def settle_batch(order_ids):
+    settled = 0
+    for order_id, result in async_to_sync(find_captured_payments)(order_ids).items():
+        if isinstance(result, Exception):
+            logger.warning("Could not reconcile order %s: %s", order_id, result)
+        elif result and settle_payment(order_id, result) is not None:
+            settled += 1
+    return settled
@@ -0,0 +1,108 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import invalidate_apartment
+from .metrics import bump, metric_day, record_payment_completed
+from .models import (
+    Apartment,
+    ApartmentImage,
+    Booking,
+    Chat,
+    Conversation,
+    HostelApproval,
+    Notification,
+    Payment,
+    User,
+)
+from .realtime import push_on_commit, push_to_user
+from .serializers import ChatSerializer, NotificationSerializer
+
+
+@receiver([post_save, post_delete], sender=Apartment)
+def invalidate_apartment_cache(sender, instance, **kwargs):
+    invalidate_apartment(instance.pk)
+
+
+@receiver(m2m_changed, sender=Apartment.food.through)
+def invalidate_apartment_food_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    # Reverse changes (food.apartment_set) list the affected apartments in pk_set
+    for apartment_id in (pk_set or ()) if reverse else (instance.pk,):
+        invalidate_apartment(apartment_id)
+
+
+@receiver([post_save, post_delete], sender=ApartmentImage)
+@receiver([post_save, post_delete], sender=HostelApproval)
+def invalidate_related_apartment_cache(sender, instance, **kwargs):
+    invalidate_apartment(instance.apartment_id)
+
+
+@receiver(post_save, sender=Chat)
+def update_conversation(sender, instance, created, **kwargs):
+    if created:
+        Conversation.objects.record_message(instance)
+
+
+@receiver(post_save, sender=Chat)
+def push_new_chat_message(sender, instance, created, **kwargs):
+    # The sender already shows the message optimistically
+    if created:
+        push_to_user(
+            instance.receiver_id, "chat.message", ChatSerializer(instance).data
+        )
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    if created:
+        push_on_commit(
+            [
+                (
+                    instance.user_id,
+                    "notification.created",
+                    NotificationSerializer(instance).data,
+                )
+            ]
+        )
+
+
+@receiver(pre_save, sender=Booking)
+@receiver(pre_save, sender=Payment)
+def remember_previous_status(sender, instance, **kwargs):
+    # post_save only sees the new row; keep the stored status to spot transitions
+    field = "status" if sender is Booking else "payment_status"
+    instance._previous_status = None
+    if not instance._state.adding:
+        instance._previous_status = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list(field, flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def count_booking(sender, instance, created, **kwargs):
+    if created:
+        bump(metric_day(instance.booking_date), bookings_created=1)
+    if instance.status == "cancelled" and instance._previous_status != "cancelled":
+        bump(metric_day(), bookings_cancelled=1)
+
+
+@receiver(post_save, sender=Payment)
+def count_payment(sender, instance, **kwargs):
+    # Settlement flips the status with update(), which records its own metrics
+    if instance.payment_status == "paid" and instance._previous_status != "paid":
+        record_payment_completed(instance.amount_value)
+
+
+@receiver(post_save, sender=User)
+def count_user(sender, instance, created, **kwargs):
+    if created:
+        bump(metric_day(instance.created_at), new_users=1)
+
+
+@receiver(post_save, sender=Apartment)
+def count_listing(sender, instance, created, **kwargs):
+    if created:
+        bump(metric_day(instance.created_at), new_listings=1)
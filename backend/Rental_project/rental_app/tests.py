@@ -1,3 +1,923 @@
-from django.test import TestCase
+import csv
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from djongo.sql2mongo import query as djongo_query
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .exports import PAYMENT_EXPORT_COLUMNS
+from .gateway import get_gateway
+from .handlers import StreamingASGIHandler
+from .indexes import (
+    INDEX_CATALOG,
+    CatalogIndex,
+    catalog,
+    index_model,
+    index_signature,
+    live_signatures,
+    meta_indexes,
+)
+from .inventory import release_bed, reserve_bed
+from .metrics import bump, metric_day, summarize
+from .models import (
+    Admin,
+    Apartment,
+    ApartmentImage,
+    Booking,
+    Chat,
+    Conversation,
+    Food,
+    HostelApproval,
+    HouseOwner,
+    Notification,
+    Payment,
+    PaymentEvent,
+    User,
+)
+from .mongo import collection, pool_stats
+from .notifications import notify, notify_many
+from .outbox import OutboxWorkerPool, process_outbox, queue_email
+from .querycache import parse_cache_stats
+from .realtime import push_in_background, user_group
+from . import repository
+from .serializers import (
+    ApartmentListSerializer,
+    ApartmentSerializer,
+    ChatSerializer,
+    ConversationSerializer,
+    NotificationSerializer,
+)
+from .services import services
+from .settlement import (
+    process_payment_events,
+    reconcile_pending_payments,
+    settle_payment,
+)
+
+
+_sequence = itertools.count()
+
+
+def make_user(user_type="seeker", **fields):
+    """A user with a unique email and phone number."""
+    number = next(_sequence)
+    fields.setdefault("email", f"{user_type}{number}@example.com")
+    fields.setdefault("phone", f"9{number:09d}")
+    fields.setdefault("name", user_type.title())
+    return User.objects.create_user(password="password", user_type=user_type, **fields)
+
+
+def make_admin():
+    number = next(_sequence)
+    return Admin.objects.create(
+        name="Admin",
+        email=f"admin{number}@example.com",
+        phone=f"8{number:09d}",
+        password_hash="x",
+    )
+
+
+def make_apartment(owner=None, **fields):
+    """An apartment of owner (a HouseOwner), or of a new owner when omitted."""
+    if owner is None:
+        owner = HouseOwner.objects.create(
+            owner=make_user("owner"), SSN=f"SSN-{next(_sequence)}"
+        )
+    fields.setdefault("title", "Hostel")
+    fields.setdefault("location", "Kochi")
+    fields.setdefault("rent", 5000)
+    fields.setdefault("duration", "long-term")
+    fields.setdefault("room_sharing_type", "shared")
+    fields.setdefault("bhk", "1BHK")
+    return Apartment.objects.create(owner=owner, **fields)
+
+
+# Counts the ORM path; the native repository path issues no ORM queries
+@override_settings(NATIVE_READS=False)
+class ApprovedApartmentsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = HouseOwner.objects.create(owner=make_user("owner"), SSN="SSN-1")
+        cls.admin = make_admin()
+        cls.food = [Food.objects.create(name=name) for name in ("breakfast", "lunch")]
+
+    def add_approved_apartments(self, count):
+        for index in range(count):
+            apartment = make_apartment(self.owner, title=f"Hostel {index}")
+            apartment.food.set(self.food)
+            HostelApproval.objects.create(
+                apartment=apartment, admin=self.admin, status="approved", comments=""
+            )
+
+    def assert_listing_queries(self, expected_count):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("paid-apartments"))
+        self.assertEqual(len(response.json()), expected_count)
+
+    def test_query_count_does_not_grow_with_apartments(self):
+        self.add_approved_apartments(2)
+        self.assert_listing_queries(2)
+
+        self.add_approved_apartments(8)
+        self.assert_listing_queries(10)
+
+
+class ApprovedApartmentsListingTests(TestCase):
+    """Apartments approved more than once are listed once, on both read paths."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin = make_admin()
+        cls.apartment = make_apartment(title="Twice approved", rent="6100.00")
+        cls.apartment.food.set([Food.objects.create(name="dinner")])
+        for approval_status in ("approved", "approved", "rejected"):
+            HostelApproval.objects.create(
+                apartment=cls.apartment, admin=admin, status=approval_status, comments=""
+            )
+        HostelApproval.objects.create(
+            apartment=make_apartment(title="Pending"), admin=admin, comments=""
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_listed_once(self, listing):
+        self.assertEqual(len(listing), 1)
+        apartment = Apartment.objects.get(apartment_id=self.apartment.apartment_id)
+        self.assertEqual(listing[0], ApartmentListSerializer(apartment).data)
+
+    def test_native_reads(self):
+        for native_reads in (True, False):
+            with self.subTest(native_reads=native_reads), self.settings(
+                NATIVE_READS=native_reads
+            ):
+                cache.clear()
+                self.assert_listed_once(
+                    self.client.get(reverse("paid-apartments")).json()
+                )
+
+    def test_paginated(self):
+        page = self.client.get(reverse("paid-apartments") + "?page_size=5").json()
+        self.assert_listed_once(page["results"])
+        self.assertIsNone(page["next"])
+
+
+
+class ApartmentCursorPaginationTests(TestCase):
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_equal_timestamps_page_without_repeats_or_gaps(self):
+        apartments = [make_apartment(title=f"Hostel {index}") for index in range(5)]
+        # Bulk imports land in the same millisecond (stored as naive UTC)
+        created_at = timezone.now().replace(tzinfo=None, microsecond=0)
+        collection(Apartment._meta.db_table).update_many(
+            {}, {"$set": {"created_at": created_at}}
+        )
+
+        first = self.get_page(reverse("apartment-list") + "?page_size=2")
+        # A row landing ahead of the cursor must not shift the later pages
+        newcomer = make_apartment(apartment_id=uuid.UUID(int=2**128 - 1))
+        collection(Apartment._meta.db_table).update_one(
+            {"apartment_id": newcomer.apartment_id}, {"$set": {"created_at": created_at}}
+        )
+        second = self.get_page(first["next"])
+        third = self.get_page(second["next"])
+
+        pages = [first, second, third]
+        seen = [row["apartment_id"] for page in pages for row in page["results"]]
+        expected = sorted((str(a.apartment_id) for a in apartments), reverse=True)
+        self.assertEqual(seen, expected)
+        self.assertIsNone(third["next"])
+
+        # Going back from the middle page returns the first page again
+        self.assertEqual(self.get_page(second["previous"])["results"], first["results"])
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class EmailOutboxTests(TransactionTestCase):
+    # The worker thread uses its own connection, so rows must be committed
+    def test_queued_email_is_delivered_by_worker(self):
+        queued = queue_email("Subject", "Body", "tenant@example.com")
+        self.assertEqual(len(mail.outbox), 0)
+
+        pool = OutboxWorkerPool(size=1, poll_interval=0.05)
+        pool.start()
+        try:
+            pool.wake()
+            for _ in range(100):
+                queued.refresh_from_db()
+                if queued.status == "sent":
+                    break
+                time.sleep(0.05)
+        finally:
+            pool.stop(timeout=1)
+
+        self.assertEqual(queued.status, "sent")
+        self.assertEqual(mail.outbox[0].to, ["tenant@example.com"])
+
+    def test_command_delivers_without_in_process_workers(self):
+        queued = queue_email("Subject", "Body", "tenant@example.com")
+        self.assertFalse(
+            [t for t in threading.enumerate() if t.name.startswith("email-outbox-")]
+        )
+
+        call_command("process_email_outbox", stdout=io.StringIO())
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "sent")
+        self.assertEqual(mail.outbox[0].to, ["tenant@example.com"])
+
+    def test_failed_send_is_retried_with_backoff(self):
+        queued = queue_email("Subject", "Body", "tenant@example.com")
+
+        with mock.patch.object(EmailMessage, "send", side_effect=OSError("down")):
+            self.assertEqual(process_outbox(), 0)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, "pending")
+        self.assertEqual(queued.attempts, 1)
+        self.assertGreater(queued.next_attempt_at, timezone.now())
+        # Not due yet, so a second pass leaves it alone
+        self.assertEqual(process_outbox(), 0)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(
+    PAYMENT_GATEWAY="rental_app.gateway.FakeGateway",
+    RAZORPAY_BACKOFF=0,
+    RAZORPAY_WEBHOOK_SECRET="webhook-secret",
+)
+class PaymentTestCase(TestCase):
+    """A tenant's booking on a two-bed apartment, paid through the fake gateway."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = make_user()
+        cls.apartment = make_apartment(total_beds=2, available_beds=2)
+        cls.booking = Booking.objects.create(apartment=cls.apartment, user=cls.tenant)
+
+    def setUp(self):
+        # The gateway is a process-wide singleton; start every test with a clean log
+        self.gateway = get_gateway()
+        self.gateway.calls = []
+        self.gateway.failures = 0
+
+    def request_payment_url(self, booking_id=None):
+        return self.client.post(
+            reverse("generate-payment-url"),
+            {
+                "user_id": self.tenant.id,
+                "apartment_id": str(self.apartment.apartment_id),
+                "amount": 5000,
+                "booking_id": str(booking_id or self.booking.booking_id),
+            },
+            content_type="application/json",
+        )
+
+
+class PaymentLinkTests(PaymentTestCase):
+    def test_payment_link_is_created_through_gateway(self):
+        response = self.request_payment_url()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["payment_url"].startswith("https://rzp.io/"))
+        self.assertEqual(
+            [name for name, _ in self.gateway.calls],
+            ["order.create", "payment_link.create"],
+        )
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+    def test_transient_gateway_failure_is_retried(self):
+        self.gateway.failures = 1
+
+        response = self.request_payment_url()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [name for name, _ in self.gateway.calls],
+            ["order.create", "order.create", "payment_link.create"],
+        )
+
+    def test_repeated_request_reuses_existing_payment(self):
+        first = self.request_payment_url().json()
+        second = self.request_payment_url().json()
+
+        self.assertEqual(second["payment_url"], first["payment_url"])
+        self.assertEqual(second["razorpay_order_id"], first["razorpay_order_id"])
+        self.assertEqual(len(self.gateway.calls), 2)
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+    def test_initiate_payment_reuses_the_order(self):
+        url = reverse("initiate-payment", args=[self.booking.booking_id])
+        first = self.client.post(url, {"amount": 5000}, content_type="application/json")
+        second = self.client.post(url, {"amount": 5000}, content_type="application/json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()["order_id"], second.json()["order_id"])
+        self.assertEqual([name for name, _ in self.gateway.calls], ["order.create"])
+
+    def initiate_payment(self):
+        return self.client.post(
+            reverse("initiate-payment", args=[self.booking.booking_id]),
+            {"amount": 5000},
+            content_type="application/json",
+        )
+
+    def test_order_and_link_flows_keep_their_own_payments(self):
+        order = self.initiate_payment()
+        link = self.request_payment_url()
+        # Each flow reuses its own payment, not the other's
+        self.assertEqual(self.initiate_payment().json()["order_id"], order.json()["order_id"])
+        self.assertEqual(self.request_payment_url().json(), link.json())
+
+        self.assertEqual(order.status_code, 201)
+        self.assertEqual(link.status_code, 200)
+        self.assertTrue(link.json()["payment_url"].startswith("https://rzp.io/"))
+        self.assertNotEqual(link.json()["razorpay_order_id"], order.json()["order_id"])
+        self.assertEqual(
+            [name for name, _ in self.gateway.calls],
+            ["order.create", "order.create", "payment_link.create"],
+        )
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 2)
+
+    def test_paid_payment_is_not_handed_back(self):
+        order_id = self.initiate_payment().json()["order_id"]
+        link_order_id = self.request_payment_url().json()["razorpay_order_id"]
+        settle_payment(order_id, "pay_1")
+        settle_payment(link_order_id, "pay_2")
+
+        self.assertEqual(self.initiate_payment().status_code, 409)
+        self.assertEqual(self.request_payment_url().status_code, 409)
+        self.assertEqual(len(self.gateway.calls), 3)
+
+    def test_amount_is_converted_to_exact_paise(self):
+        url = reverse("initiate-payment", args=[self.booking.booking_id])
+        # 19.99 * 100 is 1998.9999999999998 as a float
+        response = self.client.post(url, {"amount": 19.99}, content_type="application/json")
+
+        self.assertEqual(response.json()["amount"], 1999)
+        self.assertEqual(self.gateway.calls[0][1]["amount"], 1999)
+
+
+class PaymentWebhookTests(PaymentTestCase):
+    def send_webhook(self, event_id, event):
+        body = json.dumps(event).encode()
+        signature = hmac.new(b"webhook-secret", body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse("razorpay-webhook"),
+            body,
+            content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=signature,
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_webhook_event_settles_payment_once(self):
+        order_id = self.request_payment_url().json()["razorpay_order_id"]
+        event = {
+            "event": "payment_link.paid",
+            "payload": {
+                "payment_link": {"entity": {"reference_id": order_id}},
+                "payment": {"entity": {"id": "pay_1", "order_id": "order_link"}},
+            },
+        }
+
+        # Razorpay redelivers until it gets a 2xx; both deliveries are accepted
+        self.assertEqual(self.send_webhook("evt_1", event).status_code, 200)
+        self.assertEqual(self.send_webhook("evt_1", event).status_code, 200)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+        self.assertEqual(process_payment_events(), 1)
+        self.assertEqual(process_payment_events(), 0)
+
+        payment = Payment.objects.get(razorpay_order_id=order_id)
+        self.assertEqual(payment.payment_status, "paid")
+        self.assertEqual(payment.razorpay_payment_id, "pay_1")
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.apartment.available_beds, 1)
+
+    def test_webhook_with_bad_signature_is_rejected(self):
+        response = self.client.post(
+            reverse("razorpay-webhook"),
+            {"event": "payment.captured"},
+            content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE="forged",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_reconciliation_settles_captured_orders(self):
+        order_id = self.request_payment_url().json()["razorpay_order_id"]
+        self.assertEqual(reconcile_pending_payments(min_age=timedelta(0)), 0)
+
+        self.gateway.capture(order_id)
+        self.assertEqual(reconcile_pending_payments(min_age=timedelta(0)), 1)
+        self.assertEqual(reconcile_pending_payments(min_age=timedelta(0)), 0)
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "confirmed")
+
+    def test_interrupted_settlement_is_resumed_by_a_retry(self):
+        order_id = self.request_payment_url().json()["razorpay_order_id"]
+
+        with mock.patch(
+            "rental_app.settlement.reserve_bed", side_effect=RuntimeError("db down")
+        ):
+            with self.assertRaises(RuntimeError):
+                settle_payment(order_id, "pay_1")
+        payment = Payment.objects.get(razorpay_order_id=order_id)
+        self.assertEqual(payment.payment_status, "paid")
+
+        # A redelivered webhook finishes the booking instead of reporting "already settled"
+        self.assertEqual(settle_payment(order_id, "pay_1"), "confirmed")
+        self.assertIsNone(settle_payment(order_id, "pay_1"))
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.apartment.available_beds, 1)
+
+
+class BedInventoryTests(PaymentTestCase):
+    def create_booking(self):
+        return self.client.post(
+            reverse("create-booking"),
+            {"user": self.tenant.id, "apartment": str(self.apartment.apartment_id)},
+            content_type="application/json",
+        )
+
+    def test_beds_are_never_oversold(self):
+        apartment_id = self.apartment.apartment_id
+
+        self.assertEqual(
+            [reserve_bed(apartment_id) for _ in range(3)], [True, True, False]
+        )
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.apartment.available_beds, 0)
+
+        self.assertTrue(release_bed(apartment_id))
+        self.assertTrue(reserve_bed(apartment_id))
+
+    def test_booking_holds_a_bed_until_it_expires(self):
+        self.assertEqual(self.create_booking().status_code, 201)
+        self.assertEqual(self.create_booking().status_code, 201)
+        self.assertEqual(self.create_booking().status_code, 409)
+
+        Booking.objects.filter(hold_expires_at__isnull=False).update(
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        # Both lapsed holds are swept back before the new one is taken
+        self.assertEqual(self.create_booking().status_code, 201)
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.apartment.available_beds, 1)
+
+    def test_payment_converts_hold_without_taking_another_bed(self):
+        booking_id = self.create_booking().json()["booking_id"]
+        order_id = self.request_payment_url(booking_id).json()["razorpay_order_id"]
+
+        self.gateway.capture(order_id)
+        self.assertEqual(reconcile_pending_payments(min_age=timedelta(0)), 1)
+
+        booking = Booking.objects.get(booking_id=booking_id)
+        self.assertEqual(booking.status, "confirmed")
+        self.assertIsNone(booking.hold_expires_at)
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.apartment.available_beds, 1)
+
+
+class ExportTests(TestCase):
+    def test_export_streams_through_the_asgi_handler(self):
+        tenant = make_user()
+        booking = Booking.objects.create(apartment=make_apartment(), user=tenant)
+        Payment.objects.create(
+            transaction_id=uuid.uuid4(),
+            booking=booking,
+            user=tenant,
+            apartment_id=booking.apartment_id,
+            amount="5000.00",
+            razorpay_order_id="order_1",
+        )
+        token = jwt.encode(
+            {"admin_id": str(make_admin().admin_id)}, settings.SECRET_KEY, algorithm="HS256"
+        )
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": reverse("export_payments", args=["csv"]),
+            "query_string": b"",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+            "server": ("testserver", 80),
+        }
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(StreamingASGIHandler())(scope, receive, send)
+
+        self.assertEqual(messages[0]["status"], 200)
+        body = b"".join(message.get("body", b"") for message in messages[1:])
+        header, row = csv.reader(body.decode().splitlines())
+        self.assertEqual(header, list(PAYMENT_EXPORT_COLUMNS))
+        self.assertEqual(dict(zip(header, row))["amount"], "5000.00")
+
+    def test_streaming_body_is_produced_off_the_event_loop(self):
+        producers, senders, messages = [], [], []
+
+        def body():
+            for part in (b"first,", b"second"):
+                producers.append(threading.get_ident())
+                yield part
+
+        async def send(message):
+            senders.append(threading.get_ident())
+            messages.append(message)
+
+        async_to_sync(StreamingASGIHandler().send_response)(
+            StreamingHttpResponse(body()), send
+        )
+
+        self.assertEqual(b"".join(m.get("body", b"") for m in messages[1:]), b"first,second")
+        self.assertEqual(len(producers), 2)
+        self.assertNotIn(senders[0], producers)
+
+
+class MongoConnectionTests(TestCase):
+    def test_orm_and_raw_collections_share_one_client(self):
+        connection.ensure_connection()
+        client = connection.client_connection
+
+        self.assertIs(services.get("mongo"), client)
+        self.assertIs(collection(Payment._meta.db_table).database.client, client)
+
+    def test_pool_stats_count_checkouts(self):
+        before = pool_stats()["checkouts"]
+        collection(Payment._meta.db_table).find_one()
+
+        stats = pool_stats()
+        self.assertGreater(stats["checkouts"], before)
+        self.assertGreaterEqual(stats["open_connections"], 1)
+
+
+class IndexCatalogTests(TestCase):
+    def test_meta_indexes_are_catalogued(self):
+        self.assertIn(
+            CatalogIndex(
+                Chat._meta.db_table,
+                "chat_pair_timestamp_idx",
+                (("sender_id", 1), ("receiver_id", 1), ("timestamp", 1)),
+                None,
+            ),
+            list(meta_indexes()),
+        )
+
+    def test_index_signature(self):
+        self.assertEqual(
+            index_signature([("user_id", 1.0), ("timestamp", -1.0)], None),
+            index_signature((("user_id", 1), ("timestamp", -1)), None),
+        )
+        self.assertNotEqual(
+            index_signature([("user_id", 1)], None), index_signature([("user_id", -1)], None)
+        )
+        self.assertNotEqual(
+            index_signature([("user_id", 1)], {"read_status": 0}),
+            index_signature([("user_id", 1)], None),
+        )
+        # Special index types keep their string "direction"
+        self.assertEqual(
+            index_signature([("message", "text")], None)[0], (("message", "text"),)
+        )
+
+    def test_dry_run_reports_only_missing_indexes(self):
+        payments = collection(Payment._meta.db_table)
+        present = next(
+            entry for entry in INDEX_CATALOG if entry.name == "payment_order_idx"
+        )
+        payments.create_indexes([index_model(present)])
+        payments.create_index([("razorpay_payment_id", "text")], name="payment_search_idx")
+        self.addCleanup(payments.drop_index, "payment_search_idx")
+
+        names = {entry.collection for entry in catalog()}
+        live = {name: collection(name).index_information() for name in names}
+        missing = [
+            entry
+            for entry in catalog()
+            if index_signature(entry.keys, entry.partial)
+            not in live_signatures(live[entry.collection])
+        ]
+
+        out = io.StringIO()
+        call_command("ensure_indexes", "--dry-run", stdout=out)
+
+        # "Would create|replace <collection>.<name> [keys]"
+        reported = [
+            line.split()[2]
+            for line in out.getvalue().splitlines()
+            if line.startswith("Would ")
+        ]
+        self.assertEqual(
+            sorted(reported), sorted(f"{entry.collection}.{entry.name}" for entry in missing)
+        )
+        self.assertNotIn(f"{present.collection}.{present.name}", reported)
+        self.assertEqual(
+            {name: collection(name).index_information() for name in names}, live
+        )
+
+        call_command("ensure_indexes", stdout=io.StringIO())
+        out = io.StringIO()
+        call_command("ensure_indexes", "--dry-run", stdout=out)
+        self.assertNotIn("Would ", out.getvalue())
+
+
+class NativeReadRepositoryTests(TestCase):
+    """The pymongo repository must return exactly what the ORM serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user("owner")
+        cls.tenant = make_user()
+        cls.apartment = make_apartment(
+            HouseOwner.objects.create(owner=cls.owner, SSN="SSN-1"),
+            description="Near the metro",
+            latitude="9.93123400000000000000",
+            rent="5250.50",
+            total_beds=4,
+            available_beds=3,
+        )
+        cls.apartment.food.set([Food.objects.create(name="breakfast")])
+        HostelApproval.objects.create(
+            apartment=cls.apartment, admin=make_admin(), status="approved", comments=""
+        )
+
+        # The post_save receiver keeps the conversation summary up to date
+        Chat.objects.create(sender=cls.tenant, receiver=cls.owner, message="Is a bed free?")
+        Chat.objects.create(sender=cls.owner, receiver=cls.tenant, message="Yes, two")
+        Notification.objects.create(user=cls.tenant, message="Booking confirmed")
+        Notification.objects.create(user=cls.tenant, message="Seen", read_status=1)
+
+    def test_approved_apartments(self):
+        apartments = Apartment.objects.filter(hostelapproval__status="approved").distinct()
+        self.assertEqual(
+            repository.approved_apartments(),
+            ApartmentListSerializer(apartments, many=True).data,
+        )
+
+    def test_apartment_detail(self):
+        apartment_id = self.apartment.apartment_id
+        self.assertEqual(
+            repository.apartment_detail(apartment_id),
+            ApartmentSerializer(Apartment.objects.get(apartment_id=apartment_id)).data,
+        )
+        self.assertIsNone(repository.apartment_detail(uuid.uuid4()))
+
+    def test_unread_notifications(self):
+        notifications = Notification.objects.filter(user=self.tenant, read_status=0)
+        self.assertEqual(
+            repository.unread_notifications(self.tenant.id),
+            NotificationSerializer(notifications, many=True).data,
+        )
+
+    def test_messages_between(self):
+        messages = Chat.objects.filter(
+            Q(sender=self.tenant, receiver=self.owner)
+            | Q(sender=self.owner, receiver=self.tenant)
+        )
+        self.assertEqual(
+            repository.messages_between(self.tenant.id, self.owner.id),
+            ChatSerializer(messages, many=True).data,
+        )
+
+    def test_inbox(self):
+        conversations = (
+            Conversation.objects.filter(Q(user_low=self.owner) | Q(user_high=self.owner))
+            .select_related("user_low", "user_high")
+            .order_by("-last_timestamp")
+        )
+        inbox = repository.inbox(self.owner.id)
+        self.assertEqual(
+            inbox,
+            ConversationSerializer(
+                conversations, many=True, context={"user": self.owner}
+            ).data,
+        )
+
+        (conversation,) = inbox
+        self.assertEqual(
+            conversation["other_user"], {"id": self.tenant.id, "name": self.tenant.name}
+        )
+        self.assertEqual(conversation["last_message"], "Yes, two")
+        self.assertEqual(conversation["last_sender"], self.owner.id)
+        # One message each way, so each side has exactly one unread
+        self.assertEqual(conversation["unread_count"], 1)
+        self.assertEqual(repository.inbox(self.tenant.id)[0]["unread_count"], 1)
+
+
+@override_settings(QUERY_PARSE_CACHE=True, QUERY_PARSE_CACHE_SIZE=64)
+class QueryParseCacheTests(TestCase):
+    def test_repeated_query_shape_skips_the_parser(self):
+        first = make_user(name="First")
+        second = make_user(name="Second")
+
+        self.assertEqual(User.objects.get(id=first.id).name, "First")
+        hits = parse_cache_stats()["hits"]
+        # Same shape, different parameter: served from the cache with the new value bound
+        self.assertEqual(User.objects.get(id=second.id).name, "Second")
+        self.assertEqual(parse_cache_stats()["hits"], hits + 1)
+
+    def test_callers_never_share_the_cached_tree(self):
+        sql = 'SELECT "id" FROM "rental_app_user" WHERE "id" = %(0)s'
+        first, second = djongo_query.sqlparse(sql), djongo_query.sqlparse(sql)
+
+        self.assertIsNot(first[0], second[0])
+        self.assertIsNot(first[0].tokens[-1], second[0].tokens[-1])
+        self.assertIs(first[0].tokens[-1].parent, first[0])
+        self.assertEqual(str(first[0]), sql)
+
+    def test_concurrent_identical_queries(self):
+        users = [make_user(name=f"User {index}") for index in range(8)]
+        User.objects.get(id=users[0].id)  # Warm the cache with the shape
+        start = threading.Barrier(len(users))
+        names, errors = {}, []
+
+        def lookup(user):
+            try:
+                start.wait()
+                for _ in range(20):
+                    names[user.id] = User.objects.get(id=user.id).name
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=lookup, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(names, {user.id: user.name for user in users})
+
+    @override_settings(QUERY_PARSE_CACHE=False)
+    def test_cache_can_be_switched_off(self):
+        self.assertEqual(parse_cache_stats(), {"enabled": False})
+
+
+class DailyMetricsTests(TestCase):
+    def test_saving_a_user_counts_towards_today(self):
+        make_user()
+        bump(metric_day(), new_users=2)
+
+        today = metric_day()
+        self.assertEqual(summarize(today, today)["new_users"], 3)
+
+    def test_metrics_failure_does_not_break_saves(self):
+        with mock.patch("rental_app.metrics.collection", side_effect=RuntimeError):
+            user = make_user()
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
+
+class ConversationSummaryTests(TestCase):
+    def test_messages_update_one_summary_per_pair(self):
+        tenant = make_user()
+        owner = make_user("owner")
+        Chat.objects.create(sender=tenant, receiver=owner, message="Is a bed free?")
+        Chat.objects.create(sender=tenant, receiver=owner, message="Hello?")
+
+        conversation = Conversation.objects.get()
+        self.assertEqual(getattr(conversation, conversation.unread_field_for(owner.id)), 2)
+        self.assertEqual(getattr(conversation, conversation.unread_field_for(tenant.id)), 0)
+        self.assertEqual(conversation.last_message, "Hello?")
+        self.assertEqual(conversation.last_sender_id, tenant.id)
+
+        Conversation.objects.mark_read(owner.id, tenant.id)
+        conversation.refresh_from_db()
+        self.assertEqual(getattr(conversation, conversation.unread_field_for(owner.id)), 0)
+
+
+class ChatSyncTests(TestCase):
+    def setUp(self):
+        self.tenant = make_user()
+        self.owner = make_user("owner")
+        self.chat_ids = [
+            str(Chat.objects.create(sender=self.tenant, receiver=self.owner, message=text).chat_id)
+            for text in ("one", "two", "three", "four")
+        ]
+        # Messages sent in one burst share a millisecond
+        collection(Chat._meta.db_table).update_many(
+            {}, {"$set": {"timestamp": timezone.now().replace(tzinfo=None, microsecond=0)}}
+        )
+        self.url = reverse("sync_messages_with", args=[self.owner.id])
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.tenant)}"}
+
+    def sync(self, **params):
+        response = self.client.get(self.url, {"limit": 1, **params}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [message["chat_id"] for message in response.json()["messages"]]
+
+    def test_equal_timestamps_are_neither_skipped_nor_repeated(self):
+        newest_first = self.sync()
+        while len(newest_first) < len(self.chat_ids):
+            older = self.sync(before=newest_first[-1])
+            self.assertEqual(len(older), 1)
+            newest_first += older
+        self.assertEqual(newest_first, sorted(self.chat_ids, reverse=True))
+        self.assertEqual(self.sync(before=newest_first[-1]), [])
+
+        oldest_first = newest_first[-1:]
+        while len(oldest_first) < len(self.chat_ids):
+            oldest_first += self.sync(since=oldest_first[-1])
+        self.assertEqual(oldest_first, sorted(self.chat_ids))
+        self.assertEqual(self.sync(since=oldest_first[-1]), [])
+
+
+class ApartmentImageTests(TestCase):
+    def test_malformed_image_path_does_not_fail_the_batch(self):
+        apartment = make_apartment()
+        ApartmentImage.objects.create(
+            apartment=apartment, image_path="uploads/legacy.jpg", is_primary=True
+        )
+
+        response = self.client.get(
+            reverse("get_primary_apartment_images"), {"ids": str(apartment.apartment_id)}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["images"], {str(apartment.apartment_id): None})
+
+    def test_malformed_image_path_is_left_out_of_the_listing(self):
+        apartment = make_apartment()
+        ApartmentImage.objects.create(apartment=apartment, image_path="uploads/legacy.jpg")
+
+        response = self.client.get(
+            reverse("get_apartment_images", args=[apartment.apartment_id])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["images"], [])
+
+
+class NotificationPushTests(TestCase):
+    def test_single_and_broadcast_notifications_push_after_commit(self):
+        tenants = [make_user() for _ in range(3)]
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(user_group(tenants[0].id), channel)
+
+        threads = []
+
+        def start(events):
+            threads.append(push_in_background(events))
+            return threads[-1]
+
+        with mock.patch("rental_app.realtime.push_in_background", side_effect=start):
+            # djongo TestCases run outside a transaction, so open one here
+            with transaction.atomic():
+                notify(tenants[0].id, "Booking confirmed")
+                notifications = notify_many(
+                    [tenant.id for tenant in tenants], "Water cut at 5"
+                )
+                self.assertEqual(threads, [])
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(notifications), 3)
+        # One background batch per call, the broadcast included
+        self.assertEqual(len(threads), 2)
+        received = [async_to_sync(channel_layer.receive)(channel) for _ in range(2)]
+        self.assertEqual(
+            [(event["type"], event["data"]["message"]) for event in received],
+            [
+                ("notification.created", "Booking confirmed"),
+                ("notification.created", "Water cut at 5"),
+            ],
+        )
@@ -46,7 +46,6 @@ from .views import (
     get_all_send_received_messages_with,
     payment_callback,
     BookingCreateView,
-    PaymentInitiateView,
     generate_payment_url,
     check_payment_status,
     total_bookings,
@@ -84,7 +83,24 @@ from .views import (
     get_all_tenants,
     get_approved_apartment_by_owner,
     send_password_reset_email,
-    generate_description
+    generate_description,
+    stream_apartment_image,
+    get_primary_apartment_images,
+    get_cache_stats,
+    sync_messages_with,
+    get_inbox,
+    mark_conversation_read,
+    get_unread_notification_count,
+    notify_all_tenants,
+    razorpay_webhook,
+    get_metrics_summary,
+    get_daily_metrics,
+    create_metrics_report,
+    export_payments,
+    export_bookings,
+    cancel_booking_view,
+    get_mongo_pool_stats,
+    initiate_payment,
 )
 
 
@@ -125,6 +141,11 @@ urlpatterns = [
         get_apartment_image,
         name="get_apartment_image",
     ),
+    path(
+        "apartment-image/<uuid:image_id>/raw/",
+        stream_apartment_image,
+        name="stream_apartment_image",
+    ),
     path(
         "apartment-image/update/<uuid:image_id>/",
         update_apartment_image,
@@ -179,13 +200,30 @@ urlpatterns = [
         get_all_send_received_messages_with,
         name="get_all_send_received_messages_with",
     ),
+    path(
+        "chat/sync/<int:other_user_id>",
+        sync_messages_with,
+        name="sync_messages_with",
+    ),
+    path("chat/inbox", get_inbox, name="get_inbox"),
+    path(
+        "chat/mark-read/<int:other_user_id>",
+        mark_conversation_read,
+        name="mark_conversation_read",
+    ),
     path("booking/create/", BookingCreateView.as_view(), name="create-booking"),
+    path(
+        "booking/cancel/<uuid:booking_id>/",
+        cancel_booking_view,
+        name="cancel-booking",
+    ),
     path(
         "payment/initiate/<uuid:booking_id>/",
-        PaymentInitiateView.as_view(),
+        initiate_payment,
         name="initiate-payment",
     ),
     path("payment/callback/", payment_callback, name="payment-callback"),
+    path("payment/webhook/", razorpay_webhook, name="razorpay-webhook"),
     path("payment/url/", generate_payment_url, name="generate-payment-url"),
     path(
         "payment/status/<str:order_id>/",
@@ -227,6 +265,12 @@ urlpatterns = [
         mark_notification_as_read,
         name="mark_notification_as_read",
     ),
+    path(
+        "notifications/unread-count/",
+        get_unread_notification_count,
+        name="get_unread_notification_count",
+    ),
+    path("notify-tenants/", notify_all_tenants, name="notify_all_tenants"),
     path("register-admin/", register_admin, name="register_admin"),
     path("login-admin/", login_admin, name="login_admin"),
     path(
@@ -248,6 +292,11 @@ urlpatterns = [
     path("hostel-approval/", create_hostel_approval, name="hostel-approval"),
     path("approve-hostel/<uuid:apartment_id>", approve_hostel, name="approve_hostel"),
     path("apartments/approved/", get_approved_apartments, name="paid-apartments"),
+    path(
+        "apartments/approved/primary-images/",
+        get_primary_apartment_images,
+        name="get_primary_apartment_images",
+    ),
     path(
         "get-pending-apartments/", get_pending_apartments, name="get_pending_apartments"
     ),
@@ -340,6 +389,17 @@ urlpatterns = [
     ),
     path("get_user_details/<int:user_id>/", get_user_details, name="get_user_details"),
     path("token/verify/", is_logged_admin_in, name="token_verify"),
+    path("cache/stats/", get_cache_stats, name="get_cache_stats"),
+    path("metrics/summary/", get_metrics_summary, name="get_metrics_summary"),
+    path("metrics/daily/", get_daily_metrics, name="get_daily_metrics"),
+    path("metrics/report/", create_metrics_report, name="create_metrics_report"),
+    path("metrics/mongo-pool/", get_mongo_pool_stats, name="get_mongo_pool_stats"),
+    path(
+        "export/payments.<str:file_format>", export_payments, name="export_payments"
+    ),
+    path(
+        "export/bookings.<str:file_format>", export_bookings, name="export_bookings"
+    ),
     path('owner-by-apartment/<uuid:apartment_id>/', OwnerDetailsByApartmentView.as_view()),
     path(
         "password-reset/", send_password_reset_email, name="send_password_reset_email"
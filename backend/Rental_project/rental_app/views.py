@@ -1,33 +1,66 @@
 import base64
+import calendar
 import random
 from django.shortcuts import get_object_or_404
 from rest_framework.authentication import SessionAuthentication, TokenAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.views.decorators.csrf import csrf_exempt
-import firebase_admin
 from rest_framework.views import APIView
 import os
-from gridfs import GridFS
 import jwt
-from django.core.mail import send_mail
 import json
 from bson import ObjectId  # If using MongoDB
+from bson.errors import InvalidId
+from gridfs.errors import NoFile
 import uuid  # Import UUID
-import razorpay
-from pymongo import MongoClient
+from asgiref.sync import sync_to_async
 import datetime
+from decimal import Decimal
 from django.utils import timezone
-from django.http import HttpResponse, JsonResponse
+from django.utils.functional import SimpleLazyObject
+from django.utils.dateparse import parse_date, parse_datetime
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from .authentication import AdminAuthentication
+from .caching import (
+    apartment_key,
+    cache_stats,
+    cached_payload,
+    invalidate_apartment,
+    listing_key,
+)
+from .pagination import ApartmentCursorPagination
+from .images import IMAGE_VARIANTS, describe_image, store_variant, store_variants
+from .notifications import mark_read as mark_notifications_read
+from .notifications import notify, notify_many, unread_count
+from .outbox import queue_email
+from .gateway import PaymentGatewayError, get_gateway, verify_webhook_signature
+from .settlement import record_event, settle_payment
+from .inventory import (
+    cancel_booking,
+    hold_expiry,
+    release_bed,
+    release_expired_holds,
+    reserve_bed,
+)
+from .revenue import parse_group_by, revenue_totals
+from .services import services
+from .mongo import collection, pool_stats
+from . import repository
+from .querycache import parse_cache_stats
+from .metrics import daily_series, summarize
+from .exports import (
+    BOOKING_EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    PAYMENT_EXPORT_COLUMNS,
+    streaming_export,
+)
 from django.conf import settings
 from firebase_admin import auth
 from rest_framework.response import Response
 from rest_framework import status
 from django.db import transaction
 from django.views.decorators.csrf import csrf_exempt
-from gradio_client import Client
 import logging
-from time import sleep
 from .models import (
     HostelApproval,
     HouseOwner,
@@ -37,12 +70,15 @@ from .models import (
     ApartmentImage,
     SearchFilter,
     Chat,
+    Conversation,
     Booking,
     Payment,
     Notification,
     Admin,
     Wishlist,
     Complaint,
+    Report,
+    decimal_to_float,
 )
 from rest_framework.decorators import (
     api_view,
@@ -51,17 +87,20 @@ from rest_framework.decorators import (
 )
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.hashers import make_password, check_password
-from decimal import Decimal,InvalidOperation
-from bson.decimal128 import Decimal128
 from django.db.models import Q
 
 from django.middleware.csrf import get_token
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
 from django.core.cache import cache
 from django.contrib.auth import get_user_model
 import requests
 from django.db.models import Sum
 from .serializers import (
     ApartmentSerializer,
+    ApartmentListSerializer,
     BookingSerializerReadOnly,
     CheckOwnerVerificationSerializer,
     HouseOwnerSerializer,
@@ -71,6 +110,7 @@ from .serializers import (
     ApartmentImageSerializer,
     SearchFilterSerializer,
     ChatSerializer,
+    ConversationSerializer,
     BookingSerializer,
     PaymentSerializer,
     NotificationSerializer,
@@ -113,13 +153,13 @@ def send_otp(request):
         },  # Use timezone-aware timestamp
     )
 
-    # Send OTP via email
+    # Queue the OTP email; the outbox worker delivers it in the background
     try:
-        send_mail(
+        queue_email(
             subject="Your OTP for Registration",
-            message=f"Your OTP is: {otp}. It is valid for 5 minutes.",
+            body=f"Your OTP is: {otp}. It is valid for 5 minutes.",
             from_email="alameena068@gmail.com",
-            recipient_list=[email],
+            recipient=email,
         )
 
         return Response(
@@ -189,7 +229,7 @@ def register_user(request):
 
     # Check if email already exists in Firebase
     try:
-        auth.get_user_by_email(email)
+        auth.get_user_by_email(email, app=services.get("firebase"))
         return Response(
             {"error": "Email already exists in Firebase"},
             status=status.HTTP_400_BAD_REQUEST,
@@ -206,10 +246,15 @@ def register_user(request):
 
     try:
         # Create user in Firebase
-        new_user = auth.create_user(email=email, password=password, email_verified=True)
+        new_user = auth.create_user(
+            email=email,
+            password=password,
+            email_verified=True,
+            app=services.get("firebase"),
+        )
 
         # Update user profile to include phone number
-        auth.update_user(new_user.uid, phone_number=phone)
+        auth.update_user(new_user.uid, phone_number=phone, app=services.get("firebase"))
 
         # Store user details in MongoDB
         user = User.objects.create(
@@ -246,7 +291,7 @@ def login_user(request):
 
     try:
         # Verify user with Firebase Authentication
-        firebase_user = auth.get_user_by_email(email)
+        firebase_user = auth.get_user_by_email(email, app=services.get("firebase"))
 
         # Firebase does not store passwords, so we need to sign in using Firebase REST API
 
@@ -350,9 +395,27 @@ def add_house_owner(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def apartment_page_data(request, apartments, serializer_class=ApartmentSerializer):
+    """Serialize one cursor page of apartments with its next/previous links."""
+    paginator = ApartmentCursorPagination()
+    page = paginator.paginate_queryset(apartments, request)
+    return paginator.get_paginated_data(serializer_class(page, many=True).data)
+
+
+def apartment_page_response(
+    request, apartments, serializer_class=ApartmentSerializer, **extra
+):
+    """Respond with one cursor page of apartments; ``extra`` keys are added to the body."""
+    data = apartment_page_data(request, apartments, serializer_class)
+    return Response({**extra, **data}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 def get_apartment_list(request):
     apartments = Apartment.objects.all()
+    if ApartmentCursorPagination.is_requested(request):
+        return apartment_page_response(request, apartments)
+
     serializer = ApartmentSerializer(apartments, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -393,11 +456,20 @@ def add_apartment(request):
 @api_view(["GET"])
 def get_apartment_by_id(request, apartment_id):
     try:
-        apartment = Apartment.objects.get(apartment_id=apartment_id)
-        serializer = ApartmentSerializer(apartment)
-        return Response(serializer.data)
-    except Apartment.DoesNotExist:
+        apartment_id = uuid.UUID(str(apartment_id))
+    except ValueError:
+        return Response({"error": "Apartment not found"}, status=404)
+
+    def build():
+        if settings.NATIVE_READS:
+            return repository.apartment_detail(apartment_id)
+        apartment = Apartment.objects.filter(apartment_id=apartment_id).first()
+        return ApartmentSerializer(apartment).data if apartment else None
+
+    data = cached_payload(apartment_key(apartment_id, "detail"), build)
+    if data is None:
         return Response({"error": "Apartment not found"}, status=404)
+    return Response(data)
 
 
 @api_view(["GET", "PUT", "DELETE"])
@@ -524,6 +596,9 @@ def get_apartments_by_owner(request, owner_id):
 
         # 4. Now filter apartments by the HouseOwner
         apartments = Apartment.objects.filter(owner=house_owner)
+        if ApartmentCursorPagination.is_requested(request):
+            return apartment_page_response(request, apartments, owner_id=owner_id)
+
         apartment_serializer = ApartmentSerializer(apartments, many=True)
 
         return Response(
@@ -541,15 +616,46 @@ def get_apartments_by_owner(request, owner_id):
         return Response({"error": "HouseOwner profile not found"}, status=status.HTTP_404_NOT_FOUND)
     
 
-MONGO_URI = os.getenv("MONGO_HOST")
-MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
+# MongoDB and GridFS connect on first use, not when this module is imported
+db = SimpleLazyObject(lambda: services.get("mongo_db"))
+fs = SimpleLazyObject(lambda: services.get("gridfs"))
+fs_files = SimpleLazyObject(lambda: collection("fs.files"))
+
+# Browsers may reuse a streamed image for a day; GridFS ids change on update
+IMAGE_CACHE_MAX_AGE = 60 * 60 * 24
+
+
+def apartment_image_url(request, image_id, size=None):
+    """Absolute URL of the streaming endpoint for one apartment image."""
+    url = reverse("stream_apartment_image", args=[image_id])
+    if size:
+        url = f"{url}?size={size}"
+    return request.build_absolute_uri(url)
+
+
+def gridfs_file_ids(paths):
+    """ObjectIds of stored GridFS paths, keyed like paths.
+
+    A malformed or legacy path is left out instead of failing the batch.
+    """
+    file_ids = {}
+    for key, path in paths.items():
+        try:
+            file_ids[key] = ObjectId(path)
+        except (InvalidId, TypeError):
+            continue
+    return file_ids
 
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
-db = client[MONGO_DB_NAME]
 
-# Initialize GridFS correctly
-fs = GridFS(db)
+def delete_image_files(apartment_image):
+    """Remove the original and every resized copy of an image from GridFS."""
+    for size in (None, *IMAGE_VARIANTS):
+        path = getattr(apartment_image, f"{size}_path" if size else "image_path")
+        if path:
+            try:
+                fs.delete(ObjectId(path))
+            except (InvalidId, NoFile):
+                pass  # Ignore if file doesn't exist
 
 
 @api_view(["POST"])
@@ -570,14 +676,21 @@ def add_apartment_image(request):
     except Apartment.DoesNotExist:
         return JsonResponse({"error": "Apartment not found"}, status=404)
 
-    # Store file in GridFS
-    file_id = fs.put(file.read(), filename=file.name, content_type=file.content_type)
+    # Store file in GridFS along with its dimensions and inline placeholder
+    data = file.read()
+    file_id = fs.put(
+        data,
+        filename=file.name,
+        content_type=file.content_type,
+        **describe_image(data),
+    )
 
-    # Save reference in ApartmentImage model
+    # Save reference in ApartmentImage model together with the resized copies
     apartment_image = ApartmentImage.objects.create(
         apartment=apartment,
         image_path=str(file_id),  # Store GridFS file ID
         is_primary=is_primary,
+        **store_variants(fs, data, file_id, file.name),
     )
 
     return JsonResponse(
@@ -590,55 +703,141 @@ def add_apartment_image(request):
     )
 
 
+def load_apartment_image_metadata(apartment_id):
+    """GridFS metadata of every image of an apartment, or None when it has none."""
+    # Fetch all ApartmentImage records for this apartment
+    apartment_images = list(
+        ApartmentImage.objects.filter(apartment__apartment_id=apartment_id)
+    )
+
+    if not apartment_images:
+        return None
+
+    # Fetch only the GridFS file documents, never the chunks
+    file_ids = gridfs_file_ids(
+        {img.image_id: img.image_path for img in apartment_images}
+    )
+    gridfs_files = {
+        doc["_id"]: doc
+        for doc in fs_files.find(
+            {"_id": {"$in": list(file_ids.values())}},
+            {"filename": 1, "contentType": 1, "length": 1},
+        )
+    }
+
+    image_list = []
+    for img in apartment_images:
+        gridfs_file = gridfs_files.get(file_ids.get(img.image_id))
+        if gridfs_file:
+            image_list.append(
+                {
+                    "gridfs_id": str(gridfs_file["_id"]),
+                    "image_id": str(img.image_id),
+                    "filename": gridfs_file.get("filename"),
+                    "content_type": gridfs_file.get("contentType"),
+                    "length": gridfs_file.get("length"),
+                    "is_primary": img.is_primary,
+                }
+            )
+    return image_list
+
+
 @api_view(["GET"])
 def get_apartment_images(request, apartment_id):
-
+    """List image metadata and streaming URLs for an apartment (no image bytes)."""
     try:
-        # Ensure apartment_id is a string
-        if isinstance(apartment_id, uuid.UUID):
-            apartment_id = str(apartment_id)
-
-        # Fetch all ApartmentImage records for this apartment
-        apartment_images = ApartmentImage.objects.filter(
-            apartment__apartment_id=apartment_id
-        ).select_related("apartment")
+        image_list = cached_payload(
+            apartment_key(apartment_id, "images"),
+            lambda: load_apartment_image_metadata(apartment_id),
+        )
 
-        if not apartment_images.exists():
+        if image_list is None:
             return JsonResponse(
                 {"error": "No images found for this apartment"}, status=404
             )
 
-        # Extract all GridFS file IDs in one go
-        gridfs_ids = [ObjectId(img.image_path) for img in apartment_images]
+        # URLs depend on the requesting host, so they are added after the cache
+        images = [
+            {
+                **image,
+                "image_url": apartment_image_url(request, image["image_id"]),
+                "variant_urls": {
+                    size: apartment_image_url(request, image["image_id"], size)
+                    for size in IMAGE_VARIANTS
+                },
+            }
+            for image in image_list
+        ]
+        return JsonResponse({"images": images}, status=200)
 
-        # Fetch all GridFS files in a single batch operation
-        gridfs_files = {
-            file._id: file for file in fs.find({"_id": {"$in": gridfs_ids}})
-        }
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
 
-        # Prepare the response data
-        image_list = []
-        for img in apartment_images:
-            gridfs_file = gridfs_files.get(ObjectId(img.image_path))
-            if gridfs_file:
-                image_data = gridfs_file.read()
-                image_list.append(
-                    {
-                        "gridfs_id": str(gridfs_file._id),
-                        "image_id": str(img.image_id),
-                        "filename": gridfs_file.filename,
-                        "image_data": image_data.hex(),  # Convert binary to hex string
-                        "is_primary": img.is_primary,
-                    }
-                )
 
-        # Cache the response data for 5 minutes (300 seconds)
-        response_data = {"images": image_list}
+def get_image_variant(apartment_image, size):
+    """Return the GridFS file for a resized copy, generating and caching it if missing."""
+    field = f"{size}_path"
+    path = getattr(apartment_image, field)
+    if path:
+        try:
+            return fs.get(ObjectId(path))
+        except (InvalidId, NoFile):
+            pass  # Regenerate a copy that went missing
 
-        return JsonResponse(response_data, status=200)
+    original = fs.get(ObjectId(apartment_image.image_path))
+    path = store_variant(
+        fs, original.read(), original._id, original.filename, size
+    )
+    if path is None:
+        # Not decodable as an image, serve the original bytes instead
+        return fs.get(original._id)
 
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    ApartmentImage.objects.filter(image_id=apartment_image.image_id).update(
+        **{field: path}
+    )
+    return fs.get(ObjectId(path))
+
+
+@require_safe
+def stream_apartment_image(request, image_id):
+    """Stream a single apartment image out of GridFS with conditional GET support.
+
+    ``?size=thumbnail|card|full`` selects a resized copy instead of the original.
+    """
+    size = request.GET.get("size")
+    if size and size not in IMAGE_VARIANTS:
+        return JsonResponse(
+            {"error": f"size must be one of {', '.join(IMAGE_VARIANTS)}"}, status=400
+        )
+
+    try:
+        apartment_image = ApartmentImage.objects.get(image_id=image_id)
+        if size:
+            grid_out = get_image_variant(apartment_image, size)
+        else:
+            grid_out = fs.get(ObjectId(apartment_image.image_path))
+    except ApartmentImage.DoesNotExist:
+        return JsonResponse({"error": "Image not found"}, status=404)
+    except (InvalidId, NoFile):
+        return JsonResponse({"error": "Image file not found in GridFS"}, status=404)
+
+    # GridFS files are immutable and replaced with a new id on update
+    etag = quote_etag(str(grid_out._id))
+    last_modified = calendar.timegm(grid_out.upload_date.utctimetuple())
+
+    # GridOut yields one stored chunk at a time, so the file is never buffered
+    response = StreamingHttpResponse(
+        grid_out, content_type=grid_out.content_type or "application/octet-stream"
+    )
+    response["Content-Length"] = grid_out.length
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = f"public, max-age={IMAGE_CACHE_MAX_AGE}"
+
+    # Returns a 304 carrying the validators above when the client copy is fresh
+    return get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
 
 
 @api_view(["GET"])
@@ -694,22 +893,24 @@ def update_apartment_image(request, image_id):
         if not new_image_file:
             return JsonResponse({"error": "No new image file provided"}, status=400)
 
-        # Delete the old image from GridFS if it exists
-        if image.image_path:
-            try:
-                fs.delete(ObjectId(image.image_path))  # Remove from GridFS
-            except fs.errors.NoFile:
-                pass  # Ignore if file doesn't exist
+        # Delete the old image and its resized copies from GridFS
+        delete_image_files(image)
 
         # Save the new image to GridFS
+        data = new_image_file.read()
         new_file_id = fs.put(
-            new_image_file.read(),
+            data,
             filename=new_image_file.name,
             content_type=new_image_file.content_type,
+            **describe_image(data),
         )
 
-        # Update the database record with the new image path
+        # Update the database record with the new image and variant paths
         image.image_path = str(new_file_id)
+        for field, path in store_variants(
+            fs, data, new_file_id, new_image_file.name
+        ).items():
+            setattr(image, field, path)
         image.save()
 
         return JsonResponse(
@@ -735,12 +936,8 @@ def delete_apartment_image(request, image_id):
     try:
         image = ApartmentImage.objects.get(image_id=image_id)
 
-        # Delete from GridFS
-        if image.image_path:
-            try:
-                fs.delete(ObjectId(image.image_path))  # Remove from GridFS
-            except fs.errors.NoFile:
-                pass  # Ignore if file doesn't exist
+        # Delete the original and its resized copies from GridFS
+        delete_image_files(image)
 
         # Delete from Database
         image.delete()
@@ -818,20 +1015,6 @@ def delete_user_search_filter(request):
     )
 
 
-def safe_decimal(value):
-    """Convert Decimal128 or string to Decimal."""
-    if isinstance(value, Decimal128):
-        return Decimal(
-            value.to_decimal()
-        )  # Convert MongoDB Decimal128 to Python Decimal
-    elif isinstance(value, str):
-        try:
-            return Decimal(value)
-        except:
-            return None
-    return value
-
-
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_filtered_apartments(request):
@@ -845,9 +1028,6 @@ def get_filtered_apartments(request):
 
     apartments = Apartment.objects.all()
 
-    for apartment in apartments:
-        apartment.rent = float(apartment.rent.to_decimal())
-
     if search_filter.location:
         apartments = apartments.filter(location__icontains=search_filter.location)
     if search_filter.duration:
@@ -862,12 +1042,15 @@ def get_filtered_apartments(request):
         apartments = apartments.filter(
             parking_available=search_filter.parking_available
         )
+    # Rent bounds are applied by MongoDB on the indexed rent_value copy
     if search_filter.rent_min is not None:
-        rent_min = safe_decimal(search_filter.rent_min)
-        apartments = [apt for apt in apartments if safe_decimal(apt.rent) >= rent_min]
+        apartments = apartments.filter(
+            rent_value__gte=decimal_to_float(search_filter.rent_min)
+        )
     if search_filter.rent_max is not None:
-        rent_max = safe_decimal(search_filter.rent_max)
-        apartments = [apt for apt in apartments if safe_decimal(apt.rent) <= rent_max]
+        apartments = apartments.filter(
+            rent_value__lte=decimal_to_float(search_filter.rent_max)
+        )
 
     if not apartments:
         return Response(
@@ -893,36 +1076,16 @@ def send_message(request, receiver_id):
     notification_message = f"You have received a new message from {request.user.name}"
 
     serializer = ChatSerializer(data=request.data)
-    notification_serializer = NotificationSerializer(
-        data={"user": receiver.id, "message": notification_message}
-    )
-
-    serializer_valid = serializer.is_valid()
-    notification_serializer_valid = notification_serializer.is_valid()
-
-    if serializer.is_valid() and notification_serializer.is_valid():
-
+    if serializer.is_valid():
         serializer.save(sender=request.user, receiver=receiver)
-        notification_serializer.save()
+        notify(receiver.id, notification_message)
         return Response(
             {"message": "Message sent successfully!", "data": serializer.data},
             status=status.HTTP_201_CREATED,
         )
 
     return Response(
-        {
-            "message_errors": serializer.errors if not serializer_valid else None,
-            "notification_errors": (
-                notification_serializer.errors
-                if not notification_serializer_valid
-                else None
-            ),
-        },
-        status=status.HTTP_400_BAD_REQUEST,
-    )
-
-    return Response(
-        {serializer.errors, notification_serializer.errors},
+        {"message_errors": serializer.errors},
         status=status.HTTP_400_BAD_REQUEST,
     )
 
@@ -930,15 +1093,18 @@ def send_message(request, receiver_id):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_user_notifications(request):
-    notification = Notification.objects.filter(user=request.user, read_status=0)
+    if settings.NATIVE_READS:
+        data = repository.unread_notifications(request.user.id)
+    else:
+        notification = Notification.objects.filter(user=request.user, read_status=0)
+        data = NotificationSerializer(notification, many=True).data
 
-    if not notification:
+    if not data:
         return Response(
             {"message": "No new notifications"}, status=status.HTTP_404_NOT_FOUND
         )
 
-    serializer = NotificationSerializer(notification, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
@@ -962,9 +1128,22 @@ def mark_notification_as_read(request):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    notifications.update(read_status=1)
+    mark_notifications_read(request.user.id, notifications)
+    return Response(
+        {
+            "message": "Notifications marked as read.",
+            "unread_count": unread_count(request.user.id),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_unread_notification_count(request):
+    """Badge count for the navbar, served from the cache after the first call."""
     return Response(
-        {"message": "Notifications marked as read."}, status=status.HTTP_200_OK
+        {"unread_count": unread_count(request.user.id)}, status=status.HTTP_200_OK
     )
 
 
@@ -1086,21 +1265,156 @@ def get_all_send_received_messages_with(request, other_user_id):
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    messages = Chat.objects.filter(
-        Q(sender=request.user, receiver=other_user)
-        | Q(sender=other_user, receiver=request.user)
-    )
+    if settings.NATIVE_READS:
+        data = repository.messages_between(request.user.id, other_user.id)
+    else:
+        messages = Chat.objects.filter(
+            Q(sender=request.user, receiver=other_user)
+            | Q(sender=other_user, receiver=request.user)
+        )
+        data = ChatSerializer(messages, many=True).data
 
-    if not messages:
+    if not data:
         return Response(
             {"message": "No messages sent or received with this user."},
             status=status.HTTP_404_NOT_FOUND,
         )
 
-    serializer = ChatSerializer(messages, many=True)
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def get_inbox(request):
+    """Conversations of the current user, most recently active first."""
+    if settings.NATIVE_READS:
+        return Response(repository.inbox(request.user.id), status=status.HTTP_200_OK)
+
+    conversations = (
+        Conversation.objects.filter(
+            Q(user_low=request.user) | Q(user_high=request.user)
+        )
+        .select_related("user_low", "user_high")
+        .order_by("-last_timestamp")
+    )
+    serializer = ConversationSerializer(
+        conversations, many=True, context={"user": request.user}
+    )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def mark_conversation_read(request, other_user_id):
+    if not User.objects.filter(id=other_user_id).exists():
+        return Response(
+            {"message": "No user found with the given id!"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    Chat.objects.filter(
+        sender_id=other_user_id, receiver=request.user, is_read=False
+    ).update(is_read=True)
+    Conversation.objects.mark_read(request.user.id, other_user_id)
+
+    return Response(
+        {"message": "Conversation marked as read."}, status=status.HTTP_200_OK
+    )
+
+
+# Upper bound on the ?limit= of one conversation sync call
+CHAT_SYNC_MAX_LIMIT = 200
+
+
+def chat_cursor_filter(value, newer):
+    """Messages after (or before) a sync cursor, or None for an unknown cursor.
+
+    Messages can share a timestamp (MongoDB keeps milliseconds), so a
+    chat_id cursor is the (timestamp, chat_id) pair, matching the sync
+    ordering; a bare ISO timestamp cursor compares on the timestamp alone.
+    """
+    lookup = "gt" if newer else "lt"
+    try:
+        chat_id = uuid.UUID(value)
+    except ValueError:
+        timestamp = parse_datetime(value)
+        return Q(**{f"timestamp__{lookup}": timestamp}) if timestamp else None
+
+    timestamp = (
+        Chat.objects.filter(chat_id=chat_id).values_list("timestamp", flat=True).first()
+    )
+    if timestamp is None:
+        return None
+    return Q(**{f"timestamp__{lookup}": timestamp}) | Q(
+        timestamp=timestamp, **{f"chat_id__{lookup}": chat_id}
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync_messages_with(request, other_user_id):
+    """Return only the part of a conversation the client does not have yet.
+
+    ``?since=<timestamp or chat_id>`` returns newer messages, oldest first.
+    ``?before=<timestamp or chat_id>`` pages backwards through older history.
+    Without either, the latest ``limit`` messages are returned.
+    """
+    try:
+        other_user = User.objects.get(id=other_user_id)
+    except User.DoesNotExist:
+        return Response(
+            {"message": "No user found with the given id!"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    try:
+        limit = min(int(request.query_params.get("limit", 50)), CHAT_SYNC_MAX_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {"message": "limit must be a positive number"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    since = request.query_params.get("since")
+    before = request.query_params.get("before")
+    cursor = None
+    if since or before:
+        cursor = chat_cursor_filter(since or before, newer=bool(since))
+    if (since or before) and cursor is None:
+        return Response(
+            {"message": "Cursor must be an ISO timestamp or a known chat_id"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    messages = Chat.objects.filter(
+        Q(sender=request.user, receiver=other_user)
+        | Q(sender=other_user, receiver=request.user)
+    )
+
+    # Fetch one extra row to tell the client whether more remain
+    if since:
+        messages = messages.filter(cursor).order_by("timestamp", "chat_id")
+        page = list(messages[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        if before:
+            messages = messages.filter(cursor)
+        page = list(messages.order_by("-timestamp", "-chat_id")[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit][::-1]
+
+    return Response(
+        {
+            "messages": ChatSerializer(page, many=True).data,
+            "has_more": has_more,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
 @api_view(["GET"])
 def total_bookings(request):
     """Get total number of bookings along with the full list"""
@@ -1142,17 +1456,50 @@ class BookingCreateView(APIView):
     def post(self, request):
         serializer = BookingSerializer(data=request.data)
         if serializer.is_valid():
-            booking = serializer.save()
+            # Hold a bed for checkout so only payers who got one reach Razorpay
+            apartment_id = serializer.validated_data["apartment"].pk
+            if not reserve_bed(apartment_id):
+                release_expired_holds(apartment_id)
+                if not reserve_bed(apartment_id):
+                    return Response(
+                        {"message": "No beds available"},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+
+            try:
+                booking = serializer.save(hold_expires_at=hold_expiry())
+            except Exception:
+                release_bed(apartment_id)
+                raise
             return Response(
                 {
                     "message": "Booking created successfully",
                     "booking_id": booking.booking_id,
+                    "hold_expires_at": booking.hold_expires_at,
                 },
                 status=status.HTTP_201_CREATED,
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def cancel_booking_view(request, booking_id):
+    booking = Booking.objects.filter(booking_id=booking_id, user=request.user).first()
+    if not booking:
+        return Response(
+            {"message": "No booking found with the given ID!"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    if not cancel_booking(booking):
+        return Response(
+            {"message": "Booking is already cancelled"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response({"message": "Booking cancelled"}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 def total_payments(request):
     """Get total number of payments along with the full list"""
@@ -1223,53 +1570,132 @@ def get_payment_by_payment_id(request, payment_id):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class PaymentInitiateView(APIView):
-    def post(self, request, booking_id):
-        try:
-            booking = Booking.objects.get(booking_id=booking_id)
-            amount = request.data.get("amount")  # Amount in INR
+# How long one request may hold the right to create a booking's payment
+PAYMENT_LOCK_TIMEOUT = 60
+
+
+def amount_in_paise(amount):
+    """Rupees as sent by the client (number or string) to whole paise, without float error."""
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1)))
+
+
+def payment_idempotency_key(request, flow, booking_id, amount_paise):
+    """Scope a client Idempotency-Key header to the flow and booking, or derive one.
+
+    ``flow`` is "order" for initiate_payment and "link" for
+    generate_payment_url, so an order created for checkout is never handed
+    back where a payment link is expected (and the reverse).
+    """
+    client_key = request.headers.get("Idempotency-Key")
+    if client_key:
+        return f"{flow}:booking:{booking_id}:key:{client_key}"[:255]
+    return f"{flow}:booking:{booking_id}:amount:{amount_paise}"
+
+
+def find_idempotent_payment(key, with_link=False):
+    """Latest payment created under key that was not given up on, paid ones included."""
+    payments = Payment.objects.filter(idempotency_key=key).exclude(payment_status="failed")
+    if with_link:
+        payments = payments.exclude(payment_url__isnull=True).exclude(payment_url="")
+    return payments.order_by("-timestamp").first()
+
+
+def already_paid(payment):
+    return payment.payment_status != "pending"
 
-            # Initialize Razorpay client
-            client = razorpay.Client(
-                auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_SECRET_KEY)
-            )
 
-            # Create order
-            order_data = {
-                "amount": int(amount * 100),  # Convert to paise
+def already_paid_response():
+    return JsonResponse({"error": "This booking has already been paid"}, status=409)
+
+
+def payment_lock_key(key):
+    return f"payment-lock:{key}"
+
+
+def payment_link_payload(payment):
+    return {
+        "payment_url": payment.payment_url,
+        "razorpay_order_id": payment.razorpay_order_id,
+        "transaction_id": str(payment.transaction_id),
+        "payment_id": str(payment.payment_id),
+        "booking_id": str(payment.booking_id),
+    }
+
+
+def existing_payment_link_response(payment):
+    if already_paid(payment):
+        return already_paid_response()
+    return JsonResponse(payment_link_payload(payment), status=200)
+
+
+async def initiate_payment(request, booking_id):
+    """Create (or hand back) the Razorpay order for a booking.
+
+    Async so the gateway's retries and backoff wait on the event loop
+    instead of holding a request worker.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    try:
+        booking = await sync_to_async(Booking.objects.get)(booking_id=booking_id)
+        amount = json.loads(request.body or b"{}").get("amount")  # Amount in INR
+        amount_paise = amount_in_paise(amount)
+        key = payment_idempotency_key(request, "order", booking.booking_id, amount_paise)
+
+        # Retries and double clicks get the order that already exists
+        payment = await sync_to_async(find_idempotent_payment)(key)
+        created = False
+        if payment is None:
+            lock_key = payment_lock_key(key)
+            if not await sync_to_async(cache.add)(lock_key, True, PAYMENT_LOCK_TIMEOUT):
+                return JsonResponse(
+                    {"error": "Payment for this booking is already being created"},
+                    status=409,
+                )
+            try:
+                # The previous lock holder may have finished just before we got it
+                payment = await sync_to_async(find_idempotent_payment)(key)
+                if payment is None:
+                    # Create order through the shared, connection-pooled gateway
+                    order = await get_gateway().create_order(
+                        amount_paise, str(booking.booking_id)
+                    )
+
+                    # Save payment details in DB
+                    payment = await sync_to_async(Payment.objects.create)(
+                        booking=booking,
+                        user_id=booking.user_id,
+                        apartment_id=booking.apartment_id,
+                        amount=amount,
+                        razorpay_order_id=order["id"],
+                        payment_status="pending",
+                        idempotency_key=key,
+                    )
+                    created = True
+            finally:
+                await sync_to_async(cache.delete)(lock_key)
+
+        if already_paid(payment):
+            return already_paid_response()
+        return JsonResponse(
+            {
+                "order_id": payment.razorpay_order_id,
+                "amount": amount_paise,
                 "currency": "INR",
-                "receipt": str(booking.booking_id),
-                "payment_capture": 1,  # Auto capture payment
-            }
-            order = client.order.create(order_data)
-
-            # Save payment details in DB
-            payment = Payment.objects.create(
-                booking=booking,
-                user=booking.user,
-                apartment=booking.apartment,
-                amount=amount,
-                razorpay_order_id=order["id"],
-                payment_status="pending",
-            )
+                "booking_id": str(booking.booking_id),
+                "razorpay_key": settings.RAZORPAY_KEY_ID,
+            },
+            status=201 if created else 200,
+        )
 
-            return Response(
-                {
-                    "order_id": order["id"],
-                    "amount": order["amount"],
-                    "currency": order["currency"],
-                    "booking_id": str(booking.booking_id),
-                    "razorpay_key": settings.RAZORPAY_KEY_ID,
-                },
-                status=status.HTTP_201_CREATED,
-            )
+    except Booking.DoesNotExist:
+        return JsonResponse({"error": "Booking not found"}, status=404)
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
-        except Booking.DoesNotExist:
-            return Response(
-                {"error": "Booking not found"}, status=status.HTTP_404_NOT_FOUND
-            )
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+initiate_payment.csrf_exempt = True
 
 
 def close_tab_script():
@@ -1300,68 +1726,22 @@ def payment_callback(request):
                 return JsonResponse({"error": "Missing parameters"}, status=400)
 
             if payment_status == "paid":
-                # ✅ Fetch payment record from MongoDB
-                payment_record = payment_collection.find_one(
-                    {"razorpay_order_id": razorpay_order_id}
-                )
-
-                if not payment_record:
-                    return JsonResponse(
-                        {"error": "Payment record not found in DB"}, status=404
-                    )
-
-                # ✅ Extract and convert booking_id from Binary format
-                booking_id_binary = payment_record.get("booking_id")
-
-                if not booking_id_binary:
-                    return JsonResponse(
-                        {"error": "No booking ID found in payment record"}, status=404
-                    )
+                booking_status = settle_payment(razorpay_order_id, razorpay_payment_id)
 
-                # Convert Binary UUID to string
-                if isinstance(booking_id_binary, bytes):
-                    booking_id = str(uuid.UUID(bytes=booking_id_binary))
-                elif isinstance(booking_id_binary, uuid.UUID):
-                    booking_id = str(booking_id_binary)
-                else:
-                    booking_id = str(booking_id_binary)  # If already string, keep it
-
-                # ✅ Update MongoDB payment status
-                result = payment_collection.update_one(
-                    {"razorpay_order_id": razorpay_order_id},
-                    {
-                        "$set": {
-                            "razorpay_payment_id": razorpay_payment_id,
-                            "payment_status": "paid",
-                        }
-                    },
-                )
-
-                if result.modified_count > 0:
-                    try:
-                        with transaction.atomic():
-                            # ✅ Fetch and update booking record in SQL DB
-                            booking = Booking.objects.select_for_update().get(booking_id=booking_id)
-                            available_beds = booking.apartment.available_beds
-                            if available_beds > 0:
-                                booking.status = "confirmed"
-                                booking.save()
-                                Apartment.objects.filter(pk=booking.apartment.pk).update(available_beds=available_beds-1)
-                            else:
-                                booking.status = "cancelled"
-                                booking.save()
-                                return Response({"message": "Payment failed"}, status=status.HTTP_400_BAD_REQUEST)
-
-                        return HttpResponse(close_tab_script())
-                    except Booking.DoesNotExist:
+                if booking_status is None:
+                    if not Payment.objects.filter(
+                        razorpay_order_id=razorpay_order_id
+                    ).exists():
                         return JsonResponse(
-                            {"error": "Booking not found in SQL DB"}, status=404
+                            {"error": "Payment record not found in DB"}, status=404
                         )
+                    # Already settled by the webhook or the reconciliation job
+                    return HttpResponse(close_tab_script())
 
-                return JsonResponse(
-                    {"error": "Payment updated but no matching order found in DB"},
-                    status=404,
-                )
+                if booking_status == "cancelled":
+                    return JsonResponse({"message": "Payment failed"}, status=400)
+
+                return HttpResponse(close_tab_script())
 
             return JsonResponse(
                 {"error": "Payment not successful", "status": payment_status},
@@ -1374,19 +1754,31 @@ def payment_callback(request):
     return JsonResponse({"error": "Invalid request method"}, status=405)
 
 
-razorpay_client = razorpay.Client(
-    auth=(os.getenv("RAZORPAY_KEY_ID"), os.getenv("RAZORPAY_SECRET_KEY"))
-)
-client = MongoClient(os.getenv("MONGO_HOST"))
-# Select the database
-db = client["rental_db"]
-
-# Select the collection (example)
-payment_collection = db["rental_app_payment"]
+PAYMENT_CALLBACK_URL = "http://127.0.0.1:8000/api/payment/callback/"
 
 
 @csrf_exempt
-def generate_payment_url(request):
+def razorpay_webhook(request):
+    if request.method == "POST":
+        signature = request.headers.get("X-Razorpay-Signature")
+        if not verify_webhook_signature(request.body, signature):
+            return JsonResponse({"error": "Invalid signature"}, status=400)
+
+        try:
+            event = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+        # Queue only; settlement runs in the process_payment_events job.
+        # Redeliveries carry the same event id (and body, hence signature).
+        event_id = request.headers.get("X-Razorpay-Event-Id") or signature
+        record_event(event_id, event.get("event", ""), request.body.decode())
+        return JsonResponse({"message": "Event received"}, status=200)
+
+    return JsonResponse({"error": "Invalid request method"}, status=405)
+
+
+async def generate_payment_url(request):
     if request.method == "POST":
         try:
             data = json.loads(request.body)
@@ -1398,96 +1790,62 @@ def generate_payment_url(request):
             if not user_id or not apartment_id or not amount or not booking_id:
                 return JsonResponse({"error": "Missing required fields"}, status=400)
 
-            amount_paise = int(float(amount) * 100)
-            transaction_id = str(uuid.uuid4())
-            payment_id = str(uuid.uuid4())
-
-            # Retry logic for Razorpay order creation
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    order_data = {
-                        "amount": amount_paise,
-                        "currency": "INR",
-                        "receipt": transaction_id,
-                        "payment_capture": 1,
-                    }
-                    razorpay_order = razorpay_client.order.create(order_data)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        return JsonResponse({"error": f"Failed to create Razorpay order: {str(e)}"}, status=500)
-                    sleep(1)  # Wait for 1 second before retrying
-
-            # Retry logic for payment link creation
-            for attempt in range(max_retries):
-                try:
-                    payment_data = {
-                        "amount": amount_paise,
-                        "currency": "INR",
-                        "description": "Apartment Booking Payment",
-                        "notify": {"sms": True, "email": True},
-                        "reminder_enable": True,
-                        "callback_url": "http://127.0.0.1:8000/api/payment/callback/",
-                        "callback_method": "get",
-                        "reference_id": razorpay_order["id"],
-                    }
-                    payment_link = razorpay_client.payment_link.create(payment_data)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        return JsonResponse({"error": f"Failed to create payment link: {str(e)}"}, status=500)
-                    sleep(1)
-
-            BookingInstance = Booking.objects.filter(booking_id=booking_id).first()
-            UserInstance = User.objects.filter(id=user_id).first()
-            ApartmentInstance = Apartment.objects.filter(apartment_id=apartment_id).first()
+            # Validate before talking to Razorpay so bad input never creates an order
+            BookingInstance = await sync_to_async(
+                Booking.objects.filter(booking_id=booking_id).first
+            )()
+            UserInstance = await sync_to_async(User.objects.filter(id=user_id).first)()
+            ApartmentInstance = await sync_to_async(
+                Apartment.objects.filter(apartment_id=apartment_id).first
+            )()
 
             if not BookingInstance:
-                return Response(
-                    {"message": "No booking found with provided ID!"},
-                    status=status.HTTP_404_NOT_FOUND,
+                return JsonResponse(
+                    {"message": "No booking found with provided ID!"}, status=404
                 )
             if not UserInstance:
-                return Response(
-                    {"message": "No user found with the provided ID!"},
-                    status=status.HTTP_404_NOT_FOUND,
+                return JsonResponse(
+                    {"message": "No user found with the provided ID!"}, status=404
                 )
             if not ApartmentInstance:
-                return Response(
+                return JsonResponse(
                     {"message": "No apartment found with the provided ID!"},
-                    status=status.HTTP_404_NOT_FOUND,
+                    status=404,
                 )
 
-            serializer = PaymentSerializer(
-                data={
-                    "payment_id": payment_id,
-                    "transaction_id": transaction_id,
-                    "booking": str(BookingInstance.pk),
-                    "user": str(UserInstance.pk),
-                    "apartment": str(ApartmentInstance.pk),
-                    "amount": float(amount),
-                    "razorpay_order_id": razorpay_order["id"],
-                    "razorpay_payment_id": None,
-                    "razorpay_signature": None,
-                    "payment_status": "pending",
-                    "payment_method": "razorpay",
-                }
+            amount_paise = amount_in_paise(amount)
+            key = payment_idempotency_key(
+                request, "link", BookingInstance.booking_id, amount_paise
             )
 
-            if serializer.is_valid():
-                serializer.save()
+            # Retries and double clicks get the link that already exists
+            payment = await sync_to_async(find_idempotent_payment)(key, with_link=True)
+            if payment is not None:
+                return existing_payment_link_response(payment)
+
+            lock_key = payment_lock_key(key)
+            if not await sync_to_async(cache.add)(lock_key, True, PAYMENT_LOCK_TIMEOUT):
                 return JsonResponse(
-                    {
-                        "payment_url": payment_link["short_url"],
-                        "razorpay_order_id": razorpay_order["id"],
-                        "transaction_id": transaction_id,
-                        "payment_id": payment_id,
-                        "booking_id": booking_id,
-                    },
-                    status=200,
+                    {"error": "Payment for this booking is already being created"},
+                    status=409,
                 )
-            return JsonResponse(serializer.errors, status=405)
+            try:
+                # The previous lock holder may have finished just before we got it
+                payment = await sync_to_async(find_idempotent_payment)(
+                    key, with_link=True
+                )
+                if payment is not None:
+                    return existing_payment_link_response(payment)
+                return await create_booking_payment_link(
+                    BookingInstance,
+                    UserInstance,
+                    ApartmentInstance,
+                    amount,
+                    amount_paise,
+                    key,
+                )
+            finally:
+                await sync_to_async(cache.delete)(lock_key)
 
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=500)
@@ -1495,6 +1853,60 @@ def generate_payment_url(request):
     return JsonResponse({"error": "Invalid request method"}, status=405)
 
 
+async def create_booking_payment_link(
+    booking, user, apartment, amount, amount_paise, key
+):
+    """Create the Razorpay order and link, then record them as a pending payment."""
+    transaction_id = str(uuid.uuid4())
+    payment_id = str(uuid.uuid4())
+
+    # The gateway retries with backoff without holding a worker thread
+    gateway = get_gateway()
+    try:
+        razorpay_order = await gateway.create_order(amount_paise, transaction_id)
+    except PaymentGatewayError as e:
+        return JsonResponse(
+            {"error": f"Failed to create Razorpay order: {str(e)}"}, status=500
+        )
+
+    try:
+        payment_link = await gateway.create_payment_link(
+            amount_paise, razorpay_order["id"], PAYMENT_CALLBACK_URL
+        )
+    except PaymentGatewayError as e:
+        return JsonResponse(
+            {"error": f"Failed to create payment link: {str(e)}"}, status=500
+        )
+
+    serializer = PaymentSerializer(
+        data={
+            "payment_id": payment_id,
+            "transaction_id": transaction_id,
+            "booking": str(booking.pk),
+            "user": str(user.pk),
+            "apartment": str(apartment.pk),
+            "amount": float(amount),
+            "razorpay_order_id": razorpay_order["id"],
+            "razorpay_payment_id": None,
+            "razorpay_signature": None,
+            "payment_status": "pending",
+            "payment_method": "razorpay",
+            "idempotency_key": key,
+            "payment_url": payment_link["short_url"],
+        }
+    )
+
+    if await sync_to_async(serializer.is_valid)():
+        payment = await sync_to_async(serializer.save)()
+        # The saved row, so a replay of this request returns the same payload
+        return JsonResponse(payment_link_payload(payment), status=200)
+    return JsonResponse(serializer.errors, status=405)
+
+
+# csrf_exempt only learned to wrap coroutine views in Django 4.1
+generate_payment_url.csrf_exempt = True
+
+
 @api_view(["GET"])
 def check_payment_status(request, order_id):
     try:
@@ -1535,7 +1947,10 @@ def register_admin(request):
     try:
         # Create admin in Firebase
         user_record = auth.create_user(
-            email=email, password=password, phone_number=phone
+            email=email,
+            password=password,
+            phone_number=phone,
+            app=services.get("firebase"),
         )
 
         # Store admin in Django database with hashed password
@@ -1698,6 +2113,8 @@ def approve_hostel(request, apartment_id):
     updated_count = HostelApproval.objects.filter(apartment_id=apartment_id).update(
         status="approved"
     )
+    # Queryset updates bypass the post_save signal that clears listings
+    invalidate_apartment(apartment_id)
 
     if updated_count == 0:
         return Response(
@@ -1722,22 +2139,99 @@ def get_hostel_approval(request):
 
 @api_view(["GET"])
 def get_approved_apartments(request):
-    # Get approved apartment IDs
-    approved_apartment_ids = HostelApproval.objects.filter(
-        status="approved"
-    ).values_list("apartment_id", flat=True)
-
-    # Fetch approved apartments
-    approved_apartments = Apartment.objects.filter(
-        apartment_id__in=approved_apartment_ids
+    # Join on the approval status and prefetch food: two queries for any page size
+    approved_apartments = (
+        Apartment.objects.filter(hostelapproval__status="approved")
+        .distinct()
+        .prefetch_related("food")
     )
-    serialized_apartments = ApartmentSerializer(approved_apartments, many=True).data
+    if ApartmentCursorPagination.is_requested(request):
+        data = cached_payload(
+            listing_key(request, "approved"),
+            lambda: apartment_page_data(
+                request, approved_apartments, ApartmentListSerializer
+            ),
+        )
+        return Response(data, status=status.HTTP_200_OK)
 
+    def build():
+        if settings.NATIVE_READS:
+            return repository.approved_apartments()
+        return ApartmentListSerializer(approved_apartments, many=True).data
 
+    serialized_apartments = cached_payload(listing_key(request, "approved"), build)
 
     return JsonResponse(serialized_apartments, safe=False)
 
 
+# Upper bound on apartment ids accepted by one primary-image lookup
+MAX_PRIMARY_IMAGE_IDS = 100
+
+
+@api_view(["GET"])
+def get_primary_apartment_images(request):
+    """Primary image reference for a page of apartments given as ?ids=<uuid>,<uuid>."""
+    try:
+        apartment_ids = [
+            uuid.UUID(apartment_id)
+            for apartment_id in request.query_params.get("ids", "").split(",")
+            if apartment_id
+        ]
+    except ValueError:
+        return Response(
+            {"error": "ids must be a comma separated list of apartment UUIDs"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not apartment_ids or len(apartment_ids) > MAX_PRIMARY_IMAGE_IDS:
+        return Response(
+            {"error": f"Provide between 1 and {MAX_PRIMARY_IMAGE_IDS} apartment ids"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # One query for every image row, keeping the primary (or first) per apartment
+    primary_images = {}
+    for apartment_id, image_id, image_path, card_path, is_primary in (
+        ApartmentImage.objects.filter(apartment_id__in=apartment_ids).values_list(
+            "apartment_id", "image_id", "image_path", "card_path", "is_primary"
+        )
+    ):
+        if is_primary or apartment_id not in primary_images:
+            # Describe the card copy that is served, or the original until it exists
+            primary_images[apartment_id] = (image_id, card_path or image_path)
+
+    file_ids = gridfs_file_ids(
+        {apartment_id: path for apartment_id, (_, path) in primary_images.items()}
+    )
+
+    # One $in lookup for the stored dimensions and placeholders
+    gridfs_files = {
+        doc["_id"]: doc
+        for doc in fs_files.find(
+            {"_id": {"$in": list(file_ids.values())}},
+            {"width": 1, "height": 1, "placeholder": 1},
+        )
+    }
+
+    images = {}
+    for apartment_id in apartment_ids:
+        if apartment_id not in file_ids:
+            images[str(apartment_id)] = None
+            continue
+
+        image_id, _ = primary_images[apartment_id]
+        gridfs_file = gridfs_files.get(file_ids[apartment_id], {})
+        images[str(apartment_id)] = {
+            "image_id": str(image_id),
+            "image_url": apartment_image_url(request, image_id, "card"),
+            "width": gridfs_file.get("width"),
+            "height": gridfs_file.get("height"),
+            "placeholder": gridfs_file.get("placeholder"),
+        }
+
+    return Response({"images": images}, status=status.HTTP_200_OK)
+
+
 @api_view(["GET"])
 @authentication_classes([AdminAuthentication])
 @permission_classes([IsAuthenticated])
@@ -1749,6 +2243,8 @@ def get_pending_apartments(request):
     pending_apartments = Apartment.objects.filter(
         apartment_id__in=pending_apartment_ids
     ).order_by("-created_at")
+    if ApartmentCursorPagination.is_requested(request):
+        return apartment_page_response(request, pending_apartments)
 
     serializer = ApartmentSerializer(pending_apartments, many=True)
 
@@ -1795,22 +2291,14 @@ def add_complaint(request, apartment_id):
     notification_message = f"You have received a complaint from {request.user.name}"
 
     complaint_serializer = ComplaintSerializer(data=request.data)
-    notification_serializer = NotificationSerializer(
-        data={"user": owner.pk, "message": notification_message}
-    )
-
-    if notification_serializer.is_valid():
-        if complaint_serializer.is_valid():
-            complaint_serializer.save(
-                complainant=request.user, apartment=apartment, owner=owner
-            )
-            notification_serializer.save()
-            return Response(complaint_serializer.data, status=status.HTTP_200_OK)
+    if complaint_serializer.is_valid():
+        complaint_serializer.save(
+            complainant=request.user, apartment=apartment, owner=owner
+        )
+        notify(owner.pk, notification_message)
+        return Response(complaint_serializer.data, status=status.HTTP_200_OK)
 
-    return Response(
-        {complaint_serializer.errors, notification_serializer.errors},
-        status=status.HTTP_400_BAD_REQUEST,
-    )
+    return Response(complaint_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(["GET"])
@@ -1901,6 +2389,33 @@ def get_all_tenants(request):
     )
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def notify_all_tenants(request):
+    """Send one announcement to every tenant who booked one of the owner's hostels."""
+    if request.user.user_type != "owner":
+        return Response(
+            {"message": "You are not a owner!"}, status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    message = (request.data.get("message") or "").strip()
+    if not message:
+        return Response(
+            {"message": "Message is required"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    tenant_ids = (
+        Booking.objects.filter(apartment__owner__owner=request.user)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    notifications = notify_many(list(tenant_ids), f"{request.user.name}: {message}")
+    return Response(
+        {"message": "Tenants notified", "count": len(notifications)},
+        status=status.HTTP_201_CREATED,
+    )
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def user_profile(request):
@@ -2044,6 +2559,160 @@ def get_user_details(request, user_id):
         return Response({"error": "User not found"}, status=404)
 
 
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def get_cache_stats(request):
+    return Response(
+        {**cache_stats(), "query_parse": parse_cache_stats()}, status=status.HTTP_200_OK
+    )
+
+
+def export_filters(request, date_field):
+    """MongoDB query from ?start=&end= (YYYY-MM-DD, inclusive) and ?owner=<owner id>."""
+    query = {}
+    for param, operator, offset in (("start", "$gte", 0), ("end", "$lt", 1)):
+        value = request.query_params.get(param)
+        if not value:
+            continue
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{param} must be a date in YYYY-MM-DD format")
+        moment = datetime.datetime.combine(
+            day + datetime.timedelta(days=offset), datetime.time.min
+        )
+        query.setdefault(date_field, {})[operator] = timezone.make_aware(moment)
+
+    owner = request.query_params.get("owner")
+    if owner:
+        if not owner.isdigit():
+            raise ValueError("owner must be a numeric owner id")
+        query["apartment_id"] = {
+            "$in": list(
+                Apartment.objects.filter(owner_id=owner).values_list(
+                    "apartment_id", flat=True
+                )
+            )
+        }
+    return query
+
+
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def export_payments(request, file_format):
+    """Stream payments as CSV or NDJSON in constant memory."""
+    if file_format not in EXPORT_FORMATS:
+        return Response({"error": "Unsupported format"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        query = export_filters(request, "timestamp")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return streaming_export(
+        Payment, query, PAYMENT_EXPORT_COLUMNS, "timestamp", file_format, "payments"
+    )
+
+
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def export_bookings(request, file_format):
+    """Stream bookings as CSV or NDJSON in constant memory."""
+    if file_format not in EXPORT_FORMATS:
+        return Response({"error": "Unsupported format"}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        query = export_filters(request, "booking_date")
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return streaming_export(
+        Booking, query, BOOKING_EXPORT_COLUMNS, "booking_date", file_format, "bookings"
+    )
+
+
+DASHBOARD_MAX_DAYS = 366
+
+
+def metrics_date_range(request, default_days=30):
+    """Parse ?start=&end= (YYYY-MM-DD); defaults to the last default_days days."""
+    end = parse_date(request.query_params.get("end") or "") or timezone.localdate()
+    start = parse_date(request.query_params.get("start") or "") or (
+        end - datetime.timedelta(days=default_days - 1)
+    )
+    if start > end or (end - start).days >= DASHBOARD_MAX_DAYS:
+        raise ValueError(f"Date range must be ascending and at most {DASHBOARD_MAX_DAYS} days")
+    return start, end
+
+
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def get_metrics_summary(request):
+    """Dashboard counters for today, the requested range and all time, from the rollups."""
+    try:
+        start, end = metrics_date_range(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    today = timezone.localdate()
+    return Response(
+        {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "today": summarize(today, today),
+            "range": summarize(start, end),
+            "all_time": summarize(),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def get_mongo_pool_stats(request):
+    """Connection pool usage for this worker, to spot pool saturation."""
+    return Response(pool_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def get_daily_metrics(request):
+    """One row per day for dashboard charts."""
+    try:
+        start, end = metrics_date_range(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(daily_series(start, end), status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@authentication_classes([AdminAuthentication])
+@permission_classes([IsAuthenticated])
+def create_metrics_report(request):
+    """Freeze the current rollup summary into a usage Report."""
+    try:
+        start, end = metrics_date_range(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    content = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "totals": summarize(start, end),
+        "daily": daily_series(start, end),
+    }
+    report = Report.objects.create(
+        report_type="usage", generated_by=request.user, content=json.dumps(content)
+    )
+    return Response(
+        {"report_id": str(report.report_id), **content},
+        status=status.HTTP_201_CREATED,
+    )
+
+
 @api_view(["POST"])
 @authentication_classes([AdminAuthentication])
 def is_logged_admin_in(request):
@@ -2099,7 +2768,7 @@ def send_password_reset_email(request):
     try:
         # Check if user exists first
         try:
-            user = auth.get_user_by_email(email)
+            user = auth.get_user_by_email(email, app=services.get("firebase"))
         except auth.UserNotFoundError:
             return Response({"error": "No user found with this email"}, status=404)
         except ValueError as e:
@@ -2107,14 +2776,13 @@ def send_password_reset_email(request):
 
         # Generate password reset link
         try:
-            link = auth.generate_password_reset_link(email)
+            link = auth.generate_password_reset_link(email, app=services.get("firebase"))
 
-            send_mail(
+            queue_email(
                 subject="Reset Your Password",
-                message=f"Click the link below to reset your password:\n{link}",
+                body=f"Click the link below to reset your password:\n{link}",
                 from_email="FortiFit <alameena068@gmail.com>",
-                recipient_list=[email],
-                fail_silently=False,
+                recipient=email,
             )
             return Response({"message": "Password reset email sent"}, status=200)
 
@@ -2130,35 +2798,28 @@ def send_password_reset_email(request):
 def payments_by_owner(request, owner_id):
     
     # Get all apartments owned by the owner
-    apartments = Apartment.objects.filter(owner_id=owner_id)
+    apartment_ids = list(
+        Apartment.objects.filter(owner_id=owner_id).values_list("apartment_id", flat=True)
+    )
 
     # Get all payments made for bookings in those apartments
-    payments = Payment.objects.filter(apartment__in=apartments)\
+    payments = Payment.objects.filter(apartment_id__in=apartment_ids)\
         .select_related("booking", "user", "apartment")\
         .order_by("-timestamp")
 
     total_payments = payments.count()
-    total_amount = 0
-
-    for payment in payments:
-        if payment.payment_status == "paid":
-            try:
-                amount = payment.amount
-                if isinstance(amount, Decimal128):
-                    amount = amount.to_decimal()  
-                elif not isinstance(amount, Decimal):
-                    amount = Decimal(str(amount))  
-                total_amount += amount
-            except (InvalidOperation, ValueError) as e:
-                print("Skipping invalid amount:", payment.amount, "Error:", e)
+    # Summed by MongoDB; only paid payments count towards the balance
+    total_amount, _, _ = revenue_totals(db, apartment_ids=apartment_ids)
 
-    serializer = OwnerPaymentDetailsSerializer(payments, many=True)
-    return Response({"total_payments": total_payments, "total_amount": total_amount, "payments": serializer.data})
+    data = {"total_payments": total_payments, "total_amount": total_amount}
+    # ?summary=true skips the payment list for callers that only show the balance
+    if request.query_params.get("summary") not in ("1", "true"):
+        data["payments"] = OwnerPaymentDetailsSerializer(payments, many=True).data
+    return Response(data)
 
 
 
 
-client = Client("alameenas/gym_assastant")
 logging.basicConfig(level=logging.ERROR)
 logger = logging.getLogger(__name__)
 
@@ -2198,17 +2859,14 @@ class CompletedPaymentsTotalView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        payments = Payment.objects.filter(payment_status='paid').values_list('amount', flat=True)
-        
-        total = 0
-        for amt in payments:
-            try:
-                if isinstance(amt, Decimal128):
-                    amt = amt.to_decimal()  # Convert to Python decimal
-                elif not isinstance(amt, Decimal):
-                    amt = Decimal(str(amt))  # fallback for strings or float-like values
-                total += amt
-            except Exception as e:
-                print("Skipping invalid amount:", amt, "Error:", e)
-
-        return Response({'completed_total_amount': float(total)}) 
+        """Paid revenue summed by MongoDB, optionally ?group_by=owner,apartment,month."""
+        try:
+            group_by = parse_group_by(request.query_params.get("group_by"))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, count, groups = revenue_totals(db, group_by)
+        data = {"completed_total_amount": total, "completed_count": count}
+        if group_by:
+            data["groups"] = groups
+        return Response(data)
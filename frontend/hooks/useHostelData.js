@@ -1,12 +1,6 @@
 import { useEffect } from "react";
 import axios from "axios";
 
-export function hexToBase64(hex) {
-    return btoa(
-        hex.match(/.{1,2}/g).map(byte => String.fromCharCode(parseInt(byte, 16))).join('')
-    );
-}
-
 const useHostelData = (id, reset, setImages) => {
     async function fetch_apartment_data() {
         if (!id) return;
@@ -27,7 +21,7 @@ const useHostelData = (id, reset, setImages) => {
             .then((res) => {
                 let data = res.data?.images?.map((image) => ({
                     ...image,
-                    image_data: `data:image/jpeg;base64,${hexToBase64(image.image_data)}`
+                    image_data: image.image_url
                 }));
                 const data_length = data.length;
                 for (let i = 0; i < 3 - data_length; i++) {
@@ -37,14 +37,7 @@ export function AdminHostels() {
         }
         try {
             const response = await axios.get(`${API_URL}/apartment-images/${hostel.apartment_id}`);
-            const imageData = response.data.images[0]?.image_data;
-            const imageUrl = imageData?.startsWith("ffd8")
-                ? `data:image/jpeg;base64,${btoa(
-                    String.fromCharCode(...new Uint8Array(imageData.match(/.{1,2}/g).map(
-                        byte => parseInt(byte, 16))
-                    ))
-                )}`
-                : imageData;
+            const imageUrl = response.data.images[0]?.image_url || DEFAULT_THUMBNAIL;
             setApartmentImage(imageUrl);
             retrievedHostelImages.current[hostel.apartment_id] = imageUrl;
         } catch (error) {
@@ -41,6 +41,7 @@ const AdminDashboard = () => {
   const [totalApartments, setTotalApartments] = useState("-");
   const [limit, setLimit] = useState(4);
   const [activeUsers, setActiveUsers] = useState("-");
+  const [totalRevenue, setTotalRevenue] = useState("-");
   const [loading, setLoading] = useState(true);
   const pendingSection = useRef(null);
   const { setApprovedApartments, setAllUsers } = useApartmentStore();
@@ -89,8 +90,24 @@ const AdminDashboard = () => {
     }
   };
 
+  const getTotalRevenue = async () => {
+    try {
+      const response = await axios.get(`${API_URL}/metrics/summary/`, {
+        headers: {
+          Authorization: `Bearer ${Cookies.get("access_token")}`,
+          "Content-Type": "application/json",
+        },
+      });
+      const revenue = Math.round(response.data.all_time.revenue);
+      setTotalRevenue(`₹${revenue.toLocaleString("en-IN")}`);
+    } catch (error) {
+      console.log(error);
+    }
+  };
+
   useEffect(() => {
     getTotalUser();
+    getTotalRevenue();
   }, []);
 
   return loading ? <Spinner /> : (
@@ -144,7 +161,7 @@ const AdminDashboard = () => {
               />
               <StatCard
                 title="Total Revenue"
-                value="$34,567"
+                value={totalRevenue}
                 description="+18% from last month"
                 icon={<BarChart3 className="h-4 w-4 text-muted-foreground" />}
               />
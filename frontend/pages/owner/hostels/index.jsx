@@ -36,14 +36,6 @@ const createCustomMarker = (iconUrl, size = [30, 30]) => {
   return el;
 };
 
-// Function to convert hex to Base64
-const hexToBase64 = (hex) => {
-  const bytes = new Uint8Array(
-    hex.match(/.{1,2}/g).map((byte) => parseInt(byte, 16))
-  );
-  return Buffer.from(bytes).toString("base64");
-};
-
 const OwnerHostels = () => {
   const [map, setMap] = useState(null);
   const [selectedHostel, setSelectedHostel] = useState(null);
@@ -121,7 +113,13 @@ const OwnerHostels = () => {
               }
 
               const imagesData = await imagesResponse.json();
-              return { ...apartment, images: imagesData.images };
+              return {
+                ...apartment,
+                images: imagesData.images.map((image) => ({
+                  ...image,
+                  image_data: image.image_url,
+                })),
+              };
             } catch (error) {
               console.error(
                 `Error fetching images for apartment ${apartment.apartment_id}:`,
@@ -157,7 +155,13 @@ const OwnerHostels = () => {
               }
 
               const imagesData = await imagesResponse.json();
-              return { ...apartment, images: imagesData.images };
+              return {
+                ...apartment,
+                images: imagesData.images.map((image) => ({
+                  ...image,
+                  image_data: image.image_url,
+                })),
+              };
             } catch (error) {
               console.error(
                 `Error fetching images for apartment ${apartment.apartment_id}:`,
@@ -384,10 +388,7 @@ const OwnerHostels = () => {
             <TabsContent value={curretnTab} className="space-y-4">
               <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4">
                 {currentHostels.map((apartment) => {
-                  const imageData = apartment.images[0]?.image_data;
-                  const imageUrl = imageData.startsWith("ffd8") // Check if it's a hex string
-                    ? `data:image/jpeg;base64,${hexToBase64(imageData)}`
-                    : imageData;
+                  const imageUrl = apartment.images[0]?.image_data;
 
                   return (
                     <div
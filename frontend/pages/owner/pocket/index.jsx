@@ -38,7 +38,7 @@ const Pocket = () => {
         try {
           const token = Cookies.get('access_token_owner');
           const owner_id = Cookies.get("owner_id_number");
-          const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/owner/${owner_id}/payments/`, {
+          const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/owner/${owner_id}/payments/?summary=true`, {
             headers: {
               'Authorization': `Bearer ${token}`,
               'Content-Type': 'application/json',
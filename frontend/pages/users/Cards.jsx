@@ -24,6 +24,7 @@ const HOSTEL_ICON_URL = "/hostel.png"; // Ensure the path is correct
 const USER_ICON_URL = "/user.png"; // Ensure the path is correct
 const ITEMS_PER_PAGE = 9; // Number of hostels per page
 const DEFAULT_THUMBNAIL = "/default-image.jpg"; // Default thumbnail image
+const PRIMARY_IMAGES_BATCH_SIZE = 100; // Matches the backend limit per request
 import Cookies from 'js-cookie';
 
 const createCustomMarker = (iconUrl, size = [30, 30]) => {
@@ -36,12 +37,6 @@ const createCustomMarker = (iconUrl, size = [30, 30]) => {
     return el;
 };
 
-// Function to convert hex to Base64
-const hexToBase64 = (hex) => {
-    const bytes = new Uint8Array(hex.match(/.{1,2}/g).map((byte) => parseInt(byte, 16)));
-    return Buffer.from(bytes).toString("base64");
-};
-
 const UserHostels = () => {
     const [map, setMap] = useState(null);
     const [selectedHostel, setSelectedHostel] = useState(null);
@@ -103,32 +98,33 @@ const UserHostels = () => {
                 
                 const hostelsData = await hostelsResponse.json();
     
-                // Fetch images for each hostel
-                const hostelsWithImages = await Promise.all(
-                    hostelsData.map(async (hostel) => {
-                        try {
-                            const imagesResponse = await fetch(
-                                `http://127.0.0.1:8000/api/apartment-images/${hostel.apartment_id}/`,
-                                {
-                                    headers: { Authorization: `Bearer ${accessToken}` },
-                                    signal: abortController.signal
-                                }
-                            );
-    
-                            if (!imagesResponse.ok) {
-                                return { ...hostel, images: [{ image_data: DEFAULT_THUMBNAIL }] };
+                // Fetch the primary image of every hostel in one request
+                const primaryImages = {};
+                const ids = hostelsData.map((hostel) => hostel.apartment_id);
+                for (let i = 0; i < ids.length; i += PRIMARY_IMAGES_BATCH_SIZE) {
+                    try {
+                        const batch = ids.slice(i, i + PRIMARY_IMAGES_BATCH_SIZE).join(",");
+                        const imagesResponse = await fetch(
+                            `http://127.0.0.1:8000/api/apartments/approved/primary-images/?ids=${batch}`,
+                            {
+                                headers: { Authorization: `Bearer ${accessToken}` },
+                                signal: abortController.signal
                             }
-    
-                            const imagesData = await imagesResponse.json();
-                            return { ...hostel, images: imagesData.images };
-                        } catch (error) {
-                            if (error.name !== "AbortError") {
-                                console.error(`Error fetching images for hostel ${hostel.apartment_id}:`, error);
-                            }
-                            return { ...hostel, images: [{ image_data: DEFAULT_THUMBNAIL }] };
+                        );
+                        if (imagesResponse.ok) {
+                            Object.assign(primaryImages, (await imagesResponse.json()).images);
                         }
-                    })
-                );
+                    } catch (error) {
+                        if (error.name !== "AbortError") {
+                            console.error("Error fetching hostel images:", error);
+                        }
+                    }
+                }
+
+                const hostelsWithImages = hostelsData.map((hostel) => ({
+                    ...hostel,
+                    images: [{ image_data: primaryImages[hostel.apartment_id]?.image_url || DEFAULT_THUMBNAIL }],
+                }));
     
                 if (!isMounted) return; // Check again before state update
                 
@@ -309,10 +305,7 @@ const UserHostels = () => {
             <div className="w-full md:w-3/5 md:pr-4 overflow-y-auto">
                 <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4">
                     {currentHostels?.map((hostel) => {
-                        const imageData = hostel.images[0]?.image_data;
-                        const imageUrl = imageData.startsWith("ffd8") // Check if it's a hex string
-                            ? `data:image/jpeg;base64,${hexToBase64(imageData)}`
-                            : imageData;
+                        const imageUrl = hostel.images[0]?.image_data;
 
                         return (
                             <div
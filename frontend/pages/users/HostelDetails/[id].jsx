@@ -20,11 +20,6 @@ import Cookies from 'js-cookie';
 
 const DEFAULT_THUMBNAIL = "/default-image.jpg";
 
-const hexToBase64 = (hex) => {
-   const bytes = new Uint8Array(hex.match(/.{1,2}/g).map((byte) => parseInt(byte, 16)));
-   return Buffer.from(bytes).toString("base64");
-};
-
 const dateToCalendarFormat = (date) => ({
    year: date.getFullYear(),
    month: date.getMonth() + 1,
@@ -126,17 +121,8 @@ const HostelDetails = () => {
             }
             const imagesData = await imagesResponse.json();
 
-            // Process images
-            const imagesWithBase64 =
-               imagesData.images?.map((image) => {
-                  if (image.image_data?.startsWith("ffd8")) {
-                     return {
-                        ...image,
-                        image_url: `data:image/jpeg;base64,${hexToBase64(image.image_data)}`,
-                     };
-                  }
-                  return image;
-               }) || [];
+            // Images are streamed from their own URLs
+            const imagesWithBase64 = imagesData.images || [];
 
             // Combine apartment data with images
             const apartmentWithImages = {
@@ -388,6 +374,10 @@ const HostelDetails = () => {
             }),
          });
 
+         if (bookingResponse.status === 409) {
+            setError("No beds are left in this hostel");
+            return;
+         }
          if (!bookingResponse.ok) {
             throw new Error("Failed to create booking");
          }
@@ -9,6 +9,7 @@ import FooterSection from "../footerSection";
 import Cookies from 'js-cookie';
 
 const DEFAULT_THUMBNAIL = "/default-hostel.jpg"; // Default thumbnail image
+const PRIMARY_IMAGES_BATCH_SIZE = 100; // Matches the backend limit per request
 
 export function HostelCards() {
   const router = useRouter();
@@ -46,33 +47,34 @@ export function HostelCards() {
         
         setHostels(hostelsData);
 
-        // Fetch images for each hostel concurrently
+        // Fetch the primary image of every hostel in one request
         const images = {};
-        const imageFetchPromises = hostelsData.map(async (hostel) => {
+        const primaryImages = {};
+        const ids = hostelsData.map((hostel) => hostel.apartment_id);
+        for (let i = 0; i < ids.length; i += PRIMARY_IMAGES_BATCH_SIZE) {
           try {
+            const batch = ids.slice(i, i + PRIMARY_IMAGES_BATCH_SIZE).join(",");
             const imagesResponse = await fetch(
-              `http://127.0.0.1:8000/api/apartment-images/${hostel.apartment_id}/`
+              `http://127.0.0.1:8000/api/apartments/approved/primary-images/?ids=${batch}`
             );
-            
+
             if (!imagesResponse.ok) {
-              throw new Error(`Failed to fetch images for hostel ${hostel.apartment_id}`);
-            }
-            
-            const imagesData = await imagesResponse.json();
-            
-
-            if (imagesData.images && imagesData.images.length > 0) {
-              images[hostel.apartment_id] = imagesData.images;
-            } else {
-              images[hostel.apartment_id] = [{ image_data: DEFAULT_THUMBNAIL }];
+              throw new Error("Failed to fetch hostel images");
             }
+
+            Object.assign(primaryImages, (await imagesResponse.json()).images);
           } catch (error) {
-            console.error(`Error fetching images for hostel ${hostel.apartment_id}:`, error);
-            images[hostel.apartment_id] = [{ image_data: DEFAULT_THUMBNAIL }];
+            console.error("Error fetching hostel images:", error);
           }
+        }
+
+        hostelsData.forEach((hostel) => {
+          const primaryImage = primaryImages[hostel.apartment_id];
+          images[hostel.apartment_id] = primaryImage
+            ? [{ ...primaryImage, image_data: primaryImage.image_url }]
+            : [{ image_data: DEFAULT_THUMBNAIL }];
         });
 
-        await Promise.all(imageFetchPromises);
         setHostelImages(images);
       } catch (error) {
         console.error("Fetch error:", error);
@@ -146,17 +148,7 @@ export function HostelCards() {
       {/* Hostel Cards Grid */}
       <div className="grid grid-cols-4 sm:grid-cols-2 lg:grid-cols-4 gap-3 pt-6 px-10">
         {filteredHostels.map((hostel) => {
-          const imageData = hostelImages[hostel.apartment_id]?.[0]?.image_data || DEFAULT_THUMBNAIL;
-          let imageUrl;
-
-          if (imageData.startsWith("http")) {
-            imageUrl = imageData;
-          } else if (imageData.startsWith("ffd8")) {
-            const bytes = new Uint8Array(imageData.match(/.{1,2}/g).map((byte) => parseInt(byte, 16)));
-            imageUrl = `data:image/jpeg;base64,${Buffer.from(bytes).toString("base64")}`;
-          } else {
-            imageUrl = `data:image/jpeg;base64,${imageData}`;
-          }
+          const imageUrl = hostelImages[hostel.apartment_id]?.[0]?.image_data || DEFAULT_THUMBNAIL;
 
           return (
             <div
@@ -86,43 +86,6 @@ function UserChatInterface() {
     setApartmentTitles(titles);
   };
 
-  // Check for new messages and update if needed
-  const checkForNewMessages = async () => {
-    if (!userId || !selectedContactId) return;
-
-    try {
-      const accessToken = Cookies.get("access_token_user");
-      const response = await fetch(
-        `http://127.0.0.1:8000/api/chat/get-all-send-received-messages-with/${selectedContactId}`,
-        {
-          headers: { Authorization: `Bearer ${accessToken}` },
-        }
-      );
-
-      if (!response.ok) throw new Error("Failed to fetch messages");
-
-      const data = await response.json();
-      const updatedMessages = data.map((message) => ({
-        ...message,
-        timestamp: message.timestamp || new Date().toISOString(),
-        isSentByCurrentUser: String(message.sender) === String(userId),
-      }));
-
-      updatedMessages.sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
-
-      // Check if there are new messages by comparing with current state
-      if (JSON.stringify(updatedMessages) !== JSON.stringify(messages)) {
-        setMessages(updatedMessages);
-        // Update cache
-        messagesCache.current[selectedContactId] = updatedMessages;
-        // Scroll to bottom if new messages
-        scrollToBottom();
-      }
-    } catch (error) {
-      console.error("Error checking for new messages:", error);
-    }
-  };
-
   // Fetch messages for the selected contact
   const fetchMessages = async () => {
     if (!userId || !selectedContactId) return;
@@ -222,12 +185,28 @@ function UserChatInterface() {
     }
   }, [userId, selectedContactId]);
 
-  // Set up interval for checking new messages
+  // Receive new messages pushed by the server instead of polling
   useEffect(() => {
-    if (selectedContactId) {
-      const interval = setInterval(checkForNewMessages, 5000);
-      return () => clearInterval(interval);
-    }
+    if (!userId || !selectedContactId) return;
+
+    const accessToken = Cookies.get("access_token_user");
+    const socket = new WebSocket(`ws://127.0.0.1:8000/ws/events/?token=${accessToken}`);
+
+    socket.onmessage = (event) => {
+      const { type, data } = JSON.parse(event.data);
+      if (type !== "chat.message" || String(data.sender) !== String(selectedContactId)) return;
+
+      setMessages((prevMessages) => {
+        if (prevMessages.some((message) => message.chat_id === data.chat_id)) {
+          return prevMessages;
+        }
+        const updatedMessages = [...prevMessages, { ...data, isSentByCurrentUser: false }];
+        messagesCache.current[selectedContactId] = updatedMessages;
+        return updatedMessages;
+      });
+    };
+
+    return () => socket.close();
   }, [selectedContactId, userId]);
 
   // Scroll to bottom when messages change
@@ -30,12 +30,6 @@ const createCustomMarker = (iconUrl, size = [30, 30]) => {
   return el;
 };
 
-// Function to convert hex to Base64
-const hexToBase64 = (hex) => {
-  const bytes = new Uint8Array(hex.match(/.{1,2}/g).map((byte) => parseInt(byte, 16)));
-  return Buffer.from(bytes).toString("base64");
-};
-
 const CardDemo = () => {
   const [map, setMap] = useState(null);
   const [userLocation, setUserLocation] = useState(null);
@@ -98,7 +92,10 @@ const CardDemo = () => {
             }
 
             const imagesData = await imagesResponse.json();
-            images[hostel.id] = imagesData.images;
+            images[hostel.id] = imagesData.images.map((image) => ({
+              ...image,
+              image_data: image.image_url,
+            }));
           } catch (error) {
             console.error(`Error fetching images for hostel ${hostel.id}:`, error);
             // If there's an error, use the default thumbnail
@@ -321,10 +318,7 @@ const CardDemo = () => {
       <div className="w-full md:w-3/5 md:pr-4 overflow-y-auto">
         <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4">
           {currentHostels.map((hostel) => {
-            const imageData = hostelImages[hostel.id]?.[0]?.image_data;
-            const imageUrl = imageData?.startsWith("ffd8") // Check if it's a hex string
-              ? `data:image/jpeg;base64,${hexToBase64(imageData)}`
-              : imageData || DEFAULT_THUMBNAIL;
+            const imageUrl = hostelImages[hostel.id]?.[0]?.image_data || DEFAULT_THUMBNAIL;
 
             return (
               <div
@@ -16,11 +16,6 @@ import { Skeleton } from "@/components/ui/skeleton";
 import UserHeader from '../UserHeader';
 import Cookies from 'js-cookie';
 
-const hexToBase64 = (hex) => {
-  const bytes = new Uint8Array(hex.match(/.{1,2}/g).map((byte) => parseInt(byte, 16)));
-  return Buffer.from(bytes).toString("base64");
-};
-
 const WishlistPage = () => {
   const router = useRouter();
   const [wishlist, setWishlist] = useState([]);
@@ -80,15 +75,7 @@ const WishlistPage = () => {
 
           const imagesData = await imagesResponse.json();
 
-          const imagesWithBase64 = imagesData.images?.map((image) => {
-            if (image.image_data?.startsWith("ffd8")) {
-              return {
-                ...image,
-                image_url: `data:image/jpeg;base64,${hexToBase64(image.image_data)}`,
-              };
-            }
-            return image;
-          }) || [];
+          const imagesWithBase64 = imagesData.images || [];
 
           const hostelImage = imagesWithBase64.length > 0 ? imagesWithBase64[0].image_url : DEFAULT_THUMBNAIL;
 